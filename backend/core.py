@@ -1,20 +1,61 @@
 import pandas as pd
+import numpy as np
+import openpyxl
+import copy
+import hashlib
 import io
+import os
 import re
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional; Python loop is the fallback
+    njit = None
+
 def _user_log(message: str):
     print(f"🧾 {message}")
 
+# Compiled once at import: these run inside per-row/per-cell loops, where even
+# re's internal pattern cache lookup is measurable.
+_FLOAT_SUFFIX_RE = re.compile(r'(cr|dr)$', re.IGNORECASE)
+_DATE_RE = re.compile(r'\d{2}[-/]\d{2}[-/]\d{4}')
+_CN_ID_RE = re.compile(r'\b[A-Z]{2,5}[-/]\d{2}/\d{2}[-/]\d+\b')
+_CN_INLINE_RE = re.compile(
+    r'contract\s*note(?:\s*(?:no\.?|number))?\s*[:\-]?\s*([A-Za-z0-9/-]+)',
+    re.IGNORECASE
+)
+_CN_HDR_RE = re.compile(r'Contract\s*Note', re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+# Single-group variants for vectorized pd.Series.str.extract over whole sheets.
+_DATE_EXTRACT_RE = re.compile(r'(\d{2}[-/]\d{2}[-/]\d{4})')
+_CN_ID_EXTRACT_RE = re.compile(r'\b([A-Z]{2,5}[-/]\d{2}/\d{2}[-/]\d+)\b')
+
 def _normalize_cell(val):
     if pd.isna(val):
         return ""
     return str(val).strip()
 
+def _parse_float_series(s: pd.Series):
+    """Vectorized _parse_float over a whole column."""
+    cleaned = (
+        s.astype(str)
+        .str.replace(',', '', regex=False)
+        .str.replace('(', '-', regex=False)
+        .str.replace(')', '', regex=False)
+        .str.strip()
+        .str.replace(_FLOAT_SUFFIX_RE, '', regex=True)
+        .str.strip()
+    )
+    return pd.to_numeric(cleaned, errors='coerce')
+
 def _parse_float(val):
     try:
         v = str(val).replace(',', '').replace('(', '-').replace(')', '').strip()
-        v = re.sub(r'(cr|dr)$', '', v, flags=re.IGNORECASE).strip()
+        v = _FLOAT_SUFFIX_RE.sub('', v).strip()
         f_val = float(v)
         if pd.isna(f_val):
             return None
@@ -22,87 +63,109 @@ def _parse_float(val):
     except Exception:
         return None
 
-def _find_date(df: pd.DataFrame):
-    for i in range(min(30, len(df))):
-        row_str = df.iloc[i].astype(str).str.cat(sep=' ')
-        if "Trade Date" in row_str:
-            for col_idx in range(len(df.columns)):
-                cell_val = str(df.iloc[i, col_idx])
-                match = re.search(r'\d{2}[-/]\d{2}[-/]\d{4}', cell_val)
-                if match:
-                    try:
-                        return pd.to_datetime(match.group(0), dayfirst=True).date()
-                    except Exception:
-                        continue
-    # Fallback: first date-like value in first 10 rows
-    for i in range(min(10, len(df))):
-        for col_idx in range(len(df.columns)):
-            cell_val = str(df.iloc[i, col_idx])
-            match = re.search(r'\d{2}[-/]\d{2}[-/]\d{4}', cell_val)
-            if match:
+def _sheet_arrays(df: pd.DataFrame):
+    """Materialize a sheet once for every header-scan helper.
+
+    Returns (raw ndarray, stringified ndarray, normalized ndarray) so each
+    helper iterates plain tuples instead of re-running df.iloc/str()/
+    _normalize_header per row.
+    """
+    arr = df.to_numpy(dtype=object, copy=False)
+    flat = arr.ravel()
+    str_arr = np.array([str(x) for x in flat], dtype=object).reshape(arr.shape)
+    # Normalize with vectorized string ops over the already-stringified cells
+    # rather than one _normalize_header call per cell.
+    norm_arr = (
+        pd.Series(str_arr.ravel(), dtype=object)
+        .str.strip()
+        .str.lower()
+        .str.replace(_WS_RE, ' ', regex=True)
+        .to_numpy(dtype=object)
+        .reshape(arr.shape)
+    )
+    return arr, str_arr, norm_arr
+
+def _find_date_arr(str_arr: np.ndarray):
+    # Run the date regex once over the whole head slice (C-level str.extract)
+    # instead of a Python regex call per cell.
+    head = str_arr[:30]
+    if head.shape[0] == 0 or head.shape[1] == 0:
+        return None
+
+    def _first_parsable(row):
+        vals = pd.Series(row, dtype=object).str.extract(_DATE_EXTRACT_RE, expand=False)
+        for val in vals:
+            if isinstance(val, str):
                 try:
-                    return pd.to_datetime(match.group(0), dayfirst=True).date()
+                    return pd.to_datetime(val, dayfirst=True).date()
                 except Exception:
                     continue
+        return None
+
+    # Cheap substring prefilter first: the date regex only runs on rows that
+    # actually carry the label (plus the small fallback window).
+    for i in range(head.shape[0]):
+        if "Trade Date" in ' '.join(head[i]):
+            found = _first_parsable(head[i])
+            if found:
+                return found
+    # Fallback: first date-like value in first 10 rows
+    for i in range(min(10, head.shape[0])):
+        found = _first_parsable(head[i])
+        if found:
+            return found
     return None
 
-def _find_contract_note_no(df: pd.DataFrame):
-    # Prefer explicit Contract Note IDs like "CNT-25/26-176480604"
-    id_pattern = re.compile(r'\b[A-Z]{2,5}[-/]\d{2}/\d{2}[-/]\d+\b')
-    for i in range(min(30, len(df))):
-        row = df.iloc[i].tolist()
-        row_str = " ".join([str(x) for x in row])
+def _find_contract_note_no_arr(str_arr: np.ndarray):
+    # Prefer explicit Contract Note IDs like "CNT-25/26-176480604".
+    # Extract candidate IDs for the whole head slice in one vectorized pass;
+    # the per-cell Python logic below only runs on rows carrying the label.
+    head = str_arr[:30]
+    if head.shape[0] == 0 or head.shape[1] == 0:
+        return None
+
+    def _row_ids_for(row):
+        return pd.Series(row, dtype=object).str.extract(_CN_ID_EXTRACT_RE, expand=False).to_numpy()
+
+    # Cheap substring prefilter first: the ID regex only runs on rows that
+    # actually carry the label (or, failing that, in the fallback scan).
+    for i in range(head.shape[0]):
+        row = head[i]
+        row_str = " ".join(row)
         if "Contract Note" in row_str or "Contract note" in row_str:
-            for j in range(len(row)):
-                cell = str(row[j])
-                if re.search(r'Contract\s*Note', cell, re.IGNORECASE):
+            row_ids = _row_ids_for(row)
+            for j, cell in enumerate(row):
+                if _CN_HDR_RE.search(cell):
                     # First try: adjacent cells to the right for a proper ID pattern.
                     for k in range(j + 1, len(row)):
-                        val = str(row[k]).strip()
-                        if not val or val.lower() == "nan":
-                            continue
-                        m = id_pattern.search(val)
-                        if m:
-                            return m.group(0)
+                        if isinstance(row_ids[k], str):
+                            return row_ids[k]
                     # Second try: any cell in the same row with a proper ID pattern.
                     for k in range(len(row)):
-                        val = str(row[k]).strip()
-                        if not val or val.lower() == "nan":
-                            continue
-                        m = id_pattern.search(val)
-                        if m:
-                            return m.group(0)
+                        if isinstance(row_ids[k], str):
+                            return row_ids[k]
                     # Try extracting number from the same cell first.
-                    inline_match = re.search(
-                        r'contract\s*note(?:\s*(?:no\.?|number))?\s*[:\-]?\s*([A-Za-z0-9/-]+)',
-                        cell,
-                        re.IGNORECASE
-                    )
+                    inline_match = _CN_INLINE_RE.search(cell)
                     if inline_match:
                         val = inline_match.group(1).strip()
-                        if val and not re.match(r'\d{2}[-/]\d{2}[-/]\d{4}', val):
+                        if val and not _DATE_RE.match(val):
                             return val
                     # Next non-empty cell is likely the number
                     for k in range(j + 1, len(row)):
-                        val = str(row[k]).strip()
+                        val = row[k].strip()
                         if val and val.lower() != "nan":
-                            if re.match(r'\d{2}[-/]\d{2}[-/]\d{4}', val):
+                            if _DATE_RE.match(val):
                                 continue
                             return val
     # Fallback: scan first 30 rows for a contract note ID pattern anywhere.
-    for i in range(min(30, len(df))):
-        row = df.iloc[i].tolist()
-        for cell in row:
-            val = str(cell).strip()
-            if not val or val.lower() == "nan":
-                continue
-            m = id_pattern.search(val)
-            if m:
-                return m.group(0)
+    for i in range(head.shape[0]):
+        for val in _row_ids_for(head[i]):
+            if isinstance(val, str):
+                return val
     return None
 
 def _normalize_header(text):
-    return re.sub(r'\s+', ' ', str(text).strip().lower())
+    return _WS_RE.sub(' ', str(text).strip().lower())
 
 _TRADE_HEADER_ALIASES = {
     "order_no": {"order no", "order number"},
@@ -124,12 +187,11 @@ _TRADE_HEADER_ALIASES = {
 
 _REQUIRED_TRADE_FIELDS = {"security_desc", "quantity"}
 
-def _detect_trade_header_fixed(df: pd.DataFrame):
-    for i in range(len(df)):
-        row = df.iloc[i].tolist()
+def _detect_trade_header_fixed(norm_arr: np.ndarray):
+    for i in range(norm_arr.shape[0]):
+        row = norm_arr[i]
         col_map = {}
-        for j, cell in enumerate(row):
-            norm = _normalize_header(cell)
+        for j, norm in enumerate(row):
             for key, labels in _TRADE_HEADER_ALIASES.items():
                 if key in col_map:
                     continue
@@ -183,6 +245,14 @@ _CHARGE_LABELS = {
     },
 }
 
+# One alternation regex with a named group per charge field: a single compiled
+# pass per row replaces the keys x labels Python substring loop. Longest label
+# first within each group keeps matches deterministic.
+_CHARGE_ALT_RE = re.compile('|'.join(
+    "(?P<{}>{})".format(key, '|'.join(sorted((re.escape(l) for l in labels), key=len, reverse=True)))
+    for key, labels in _CHARGE_LABELS.items()
+))
+
 def _extract_row_value(row):
     for val in reversed(row):
         f = _parse_float(val)
@@ -190,7 +260,7 @@ def _extract_row_value(row):
             return f
     return None
 
-def _extract_charges_fixed(df: pd.DataFrame):
+def _extract_charges_fixed(arr: np.ndarray, norm_arr: np.ndarray):
     charges = {
         "pay_in_out_obligation": None,
         "taxable_value_of_supply": None,
@@ -205,21 +275,23 @@ def _extract_charges_fixed(df: pd.DataFrame):
         "net_amount_receivable": None,
     }
     debug = {"matched_rows": [], "missing_fields": []}
-    for i in range(len(df)):
-        row = df.iloc[i].tolist()
-        row_labels = [_normalize_header(cell) for cell in row if _normalize_header(cell)]
-        for key, labels in _CHARGE_LABELS.items():
+    for i in range(arr.shape[0]):
+        # ' | ' keeps labels from matching across cell boundaries.
+        row_joined = ' | '.join(cell for cell in norm_arr[i] if cell)
+        if not row_joined:
+            continue
+        for m in _CHARGE_ALT_RE.finditer(row_joined):
+            key = m.lastgroup
             if charges[key] is not None:
                 continue
-            if any(any(label in row_label for label in labels) for row_label in row_labels):
-                val = _extract_row_value(row)
-                if val is not None:
-                    charges[key] = val
-                    debug["matched_rows"].append({
-                        "field": key,
-                        "row_index": i,
-                        "value": val
-                    })
+            val = _extract_row_value(arr[i])
+            if val is not None:
+                charges[key] = val
+                debug["matched_rows"].append({
+                    "field": key,
+                    "row_index": i,
+                    "value": val
+                })
     debug["missing_fields"] = [k for k, v in charges.items() if v is None]
     return charges, debug
 
@@ -234,62 +306,68 @@ def _parse_contract_note_df(df: pd.DataFrame, sheet_name: str):
     if df is None or df.empty:
         return None
 
-    trade_date = _find_date(df)
+    arr, str_arr, norm_arr = _sheet_arrays(df)
+
+    trade_date = _find_date_arr(str_arr)
     if not trade_date:
         _user_log(f"[parse_contract_note] Skipping sheet '{sheet_name}': could not detect trade date.")
         return None
 
-    contract_note_no = _find_contract_note_no(df)
-    header_idx, col_map = _detect_trade_header_fixed(df)
+    contract_note_no = _find_contract_note_no_arr(str_arr)
+    header_idx, col_map = _detect_trade_header_fixed(norm_arr)
     trades = []
     warnings = []
 
     if header_idx is not None:
-        for i in range(header_idx + 1, len(df)):
-            row = df.iloc[i].tolist()
-
-            def get_col(key):
-                if key not in col_map:
-                    return None
-                return row[col_map[key]]
-
-            security_desc = _normalize_cell(get_col("security_desc"))
-            qty_val = _parse_float(get_col("quantity"))
-            if not security_desc and qty_val is None:
-                continue
-            if qty_val is None or qty_val == 0:
-                continue
-
-            raw_side = _normalize_cell(get_col("side")).upper() if get_col("side") is not None else ""
-            if raw_side in ["B", "BUY"]:
-                side = "BUY"
-            elif raw_side in ["S", "SELL"]:
-                side = "SELL"
-            else:
-                side = None
-
-            trade = {
-                "contract_note_no": contract_note_no,
-                "trade_date": trade_date,
-                "order_no": _normalize_cell(get_col("order_no")),
-                "order_time": _normalize_cell(get_col("order_time")),
-                "trade_no": _normalize_cell(get_col("trade_no")),
-                "trade_time": _normalize_cell(get_col("trade_time")),
-                "security_desc": security_desc,
-                "side": side,
-                "quantity": qty_val,
-                "exchange": _normalize_cell(get_col("exchange")),
-                "gross_rate": _parse_float(get_col("gross_rate")),
-                "net_total": _parse_float(get_col("net_total")),
-                "sheet_name": sheet_name
-            }
-            trades.append(trade)
+        # Build the trade list column-at-a-time: vectorized normalization and
+        # to_numeric passes, one filter, then a single to_dict('records').
+        body = df.iloc[header_idx + 1:]
+        n = len(body)
+        empty_text = pd.Series([""] * n, index=body.index, dtype=object)
+        nan_num = pd.Series(np.nan, index=body.index)
+
+        def _text_col(key):
+            if key not in col_map:
+                return empty_text
+            # fillna must run before astype(str): on pandas 2.x astype
+            # stringifies missing cells to the literal 'None'/'nan' first,
+            # which would leave nothing for fillna to replace.
+            return body.iloc[:, col_map[key]].fillna("").astype(str).str.strip()
+
+        def _num_col(key):
+            if key not in col_map:
+                return nan_num
+            return _parse_float_series(body.iloc[:, col_map[key]])
+
+        side = _text_col("side").str.upper().map({"B": "BUY", "BUY": "BUY", "S": "SELL", "SELL": "SELL"})
+        sub = pd.DataFrame({
+            "contract_note_no": contract_note_no,
+            "trade_date": trade_date,
+            "order_no": _text_col("order_no"),
+            "order_time": _text_col("order_time"),
+            "trade_no": _text_col("trade_no"),
+            "trade_time": _text_col("trade_time"),
+            "security_desc": _text_col("security_desc"),
+            "side": side.astype(object).where(side.notna(), None),
+            "quantity": _num_col("quantity"),
+            "exchange": _text_col("exchange"),
+            "gross_rate": np.nan,
+            "net_total": np.nan,
+            "sheet_name": sheet_name,
+        }, index=body.index)
+        gross_rate = _num_col("gross_rate")
+        net_total = _num_col("net_total")
+        sub["gross_rate"] = gross_rate.astype(object).where(gross_rate.notna(), None)
+        sub["net_total"] = net_total.astype(object).where(net_total.notna(), None)
+
+        sub = sub[sub["quantity"].notna() & (sub["quantity"] != 0)]
+        trades = sub.to_dict("records")
     else:
         warnings.append("Required trade table headers not found; sheet skipped.")
         _user_log(f"[parse_contract_note] Skipping sheet '{sheet_name}': required trade headers missing.")
         return None
 
-    charges, charges_debug = _extract_charges_fixed(df)
+    charges, charges_debug = _extract_charges_fixed(arr, norm_arr)
     for key in _OPTIONAL_ZERO_CHARGE_FIELDS:
         if charges.get(key) is None:
             charges[key] = 0.0
@@ -309,27 +387,95 @@ def _parse_contract_note_df(df: pd.DataFrame, sheet_name: str):
         "warnings": warnings,
     }
 
-def parse_contract_note(content: bytes, progress_cb=None):
+# Below this sheet count, fork + pickle overhead outweighs parallel parsing.
+_PARALLEL_SHEET_MIN = 4
+
+# Re-uploads of the same file are common during debugging/retries; memoize
+# parse results by content hash. Deep copies keep cached entries immutable.
+_PARSE_CACHE = OrderedDict()
+_PARSE_CACHE_MAX = 8
+
+def _content_stream(content):
+    """Accept raw bytes or a seekable file-like (e.g. an upload's spooled
+    temp file) and return it rewound, without copying file-likes into RAM."""
+    if isinstance(content, (bytes, bytearray)):
+        return io.BytesIO(content)
+    content.seek(0)
+    return content
+
+def _content_hash(stream):
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: stream.read(1 << 20), b""):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
+
+def _parse_contract_note_seq(content):
+    # Picklable worker entry for cross-file pools: sheet-level fan-out is
+    # disabled so worker processes don't spawn nested pools.
+    return parse_contract_note(content, parallel_sheets=False)
+
+def parse_contract_note(content, progress_cb=None, parallel_sheets=True):
     """
     Parses broker contract notes (supports .xlsx and .csv).
+    Accepts raw bytes or a seekable file-like object.
     Returns a list of parsed sheets with trades + charges.
     """
+    stream = _content_stream(content)
+    cache_key = _content_hash(stream)
+    cached = _PARSE_CACHE.get(cache_key)
+    if cached is not None:
+        _PARSE_CACHE.move_to_end(cache_key)
+        if callable(progress_cb):
+            total = max(len(cached), 1)
+            for idx, row in enumerate(cached, start=1):
+                progress_cb(idx, total, row.get("sheet_name"))
+        return copy.deepcopy(cached)
+
     try:
         parsed_rows = []
 
-        # STRATEGY 1: Try reading as Excel (.xlsx) first (all sheets)
+        # STRATEGY 1: Try reading as Excel (.xlsx) first (all sheets).
+        # read_only streams one sheet at a time instead of materializing the
+        # whole workbook the way pd.read_excel(sheet_name=None) does.
         try:
-            sheets = pd.read_excel(io.BytesIO(content), sheet_name=None, header=None, engine='openpyxl')
-            total_sheets = max(len(sheets), 1)
-            for idx, (sheet_name, df) in enumerate(sheets.items(), start=1):
-                parsed = _parse_contract_note_df(df, sheet_name)
-                if parsed:
-                    parsed_rows.append(parsed)
-                if callable(progress_cb):
-                    progress_cb(idx, total_sheets, sheet_name)
+            wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+            try:
+                sheet_names = [ws.title for ws in wb.worksheets]
+                total_sheets = max(len(sheet_names), 1)
+                if parallel_sheets and len(sheet_names) >= _PARALLEL_SHEET_MIN:
+                    # Sheets parse independently; fan out across cores. This
+                    # path materializes all sheets up front, which is the
+                    # price of pickling them to workers.
+                    dfs = [pd.DataFrame(ws.iter_rows(values_only=True)) for ws in wb.worksheets]
+                    max_workers = min(os.cpu_count() or 1, len(dfs))
+                    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                        futures = [
+                            executor.submit(_parse_contract_note_df, df, name)
+                            for df, name in zip(dfs, sheet_names)
+                        ]
+                        for idx, future in enumerate(futures, start=1):
+                            parsed = future.result()
+                            if parsed:
+                                parsed_rows.append(parsed)
+                            if callable(progress_cb):
+                                progress_cb(idx, total_sheets, sheet_names[idx - 1])
+                else:
+                    # Small workbooks stay sequential to avoid fork overhead.
+                    for idx, ws in enumerate(wb.worksheets, start=1):
+                        df = pd.DataFrame(ws.iter_rows(values_only=True))
+                        parsed = _parse_contract_note_df(df, ws.title)
+                        if parsed:
+                            parsed_rows.append(parsed)
+                        del df
+                        if callable(progress_cb):
+                            progress_cb(idx, total_sheets, ws.title)
+            finally:
+                wb.close()
         except:
             # STRATEGY 2: Fallback to CSV
-            df = pd.read_csv(io.BytesIO(content), header=None)
+            stream.seek(0)
+            df = pd.read_csv(stream, header=None)
             parsed = _parse_contract_note_df(df, "Sheet1")
             if parsed:
                 parsed_rows.append(parsed)
@@ -340,17 +486,21 @@ def parse_contract_note(content: bytes, progress_cb=None):
             _user_log("[parse_contract_note] No sheets matched the expected fixed schema.")
             return []
 
+        _PARSE_CACHE[cache_key] = copy.deepcopy(parsed_rows)
+        while len(_PARSE_CACHE) > _PARSE_CACHE_MAX:
+            _PARSE_CACHE.popitem(last=False)
         return parsed_rows
     except Exception as e:
         _user_log(f"Global Parsing Error: {e}")
         return []
 
-def parse_tradebook(content: bytes):
+def parse_tradebook(content):
     """
     Parse broker tradebook CSV into a normalized dataframe.
+    Accepts raw bytes or a seekable file-like object.
     """
     try:
-        df = pd.read_csv(io.BytesIO(content))
+        df = pd.read_csv(_content_stream(content))
     except Exception:
         raise ValueError("Could not read Tradebook. Ensure it is a valid CSV file.")
 
@@ -365,9 +515,11 @@ def parse_tradebook(content: bytes):
         raise ValueError("Date format error in Tradebook. Expected YYYY-MM-DD.")
 
     df['trade_id'] = df['trade_id'].astype(str)
-    df['symbol'] = df['symbol'].astype(str)
+    # category: symbols/sides repeat heavily, so downstream groupbys and
+    # comparisons run on integer codes instead of object strings.
+    df['symbol'] = df['symbol'].astype(str).astype('category')
     df['isin'] = df.get('isin', '').astype(str) if 'isin' in df.columns else ''
-    df['trade_type'] = df['trade_type'].astype(str).str.upper()
+    df['trade_type'] = df['trade_type'].astype(str).str.upper().astype('category')
     df['quantity'] = df['quantity'].astype(float)
     df['price'] = df['price'].astype(float)
     df['gross_amount'] = df['quantity'] * df['price']
@@ -378,31 +530,34 @@ def _apply_allocations(trades_df, notes_df):
     if trades_df.empty:
         return trades_df.copy()
 
-    merged = trades_df.merge(notes_df, on='date', how='left')
     # Allocate only actual charges, not settlement/net receivable.
-    merged['total_brokerage'] = merged.get('total_brokerage', 0.0)
-    merged['total_taxes'] = merged.get('total_taxes', 0.0)
-    merged['total_other_charges'] = merged.get('total_other_charges', 0.0)
-    merged['daily_charges'] = (
-        merged['total_brokerage'].fillna(0.0).abs() +
-        merged['total_taxes'].fillna(0.0).abs() +
-        merged['total_other_charges'].fillna(0.0).abs()
-    )
-
-    daily_turnover = merged.groupby('date')['gross_amount'].transform('sum')
-
-    merged['allocated'] = 0.0
-    mask = daily_turnover > 0
-    merged.loc[mask, 'allocated'] = (
-        merged.loc[mask, 'gross_amount'] / daily_turnover.loc[mask]
-    ) * merged.loc[mask, 'daily_charges']
-
-    merged['net_price'] = merged.apply(
-        lambda x: (x['gross_amount'] + x['allocated']) / x['quantity']
-        if x['type'] == 'BUY'
-        else (x['gross_amount'] - x['allocated']) / x['quantity'],
-        axis=1
+    # Do the ratio math on a small per-date frame, then broadcast a single
+    # charge-per-rupee column back onto the trades; this avoids trade-sized
+    # temporaries from merge + groupby-transform.
+    daily = trades_df.groupby('date', sort=False)['gross_amount'].sum().rename('daily_turnover').reset_index()
+    daily = daily.merge(notes_df, on='date', how='left')
+    daily['total_brokerage'] = daily.get('total_brokerage', 0.0)
+    daily['total_taxes'] = daily.get('total_taxes', 0.0)
+    daily['total_other_charges'] = daily.get('total_other_charges', 0.0)
+    daily['daily_charges'] = (
+        daily['total_brokerage'].fillna(0.0).abs() +
+        daily['total_taxes'].fillna(0.0).abs() +
+        daily['total_other_charges'].fillna(0.0).abs()
     )
+    daily['charge_per_rupee'] = 0.0
+    mask = daily['daily_turnover'] > 0
+    daily.loc[mask, 'charge_per_rupee'] = daily.loc[mask, 'daily_charges'] / daily.loc[mask, 'daily_turnover']
+
+    merged = trades_df.merge(daily[['date', 'charge_per_rupee']], on='date', how='left')
+    merged['allocated'] = merged['gross_amount'] * merged['charge_per_rupee'].fillna(0.0)
+
+    # Charges increase BUY cost and reduce SELL proceeds; a sign flip is all
+    # the per-row lambda did, so compute it as one NumPy pass.
+    sign = np.where(merged['type'].to_numpy() == 'BUY', 1.0, -1.0)
+    qty = merged['quantity'].to_numpy(dtype=np.float64)
+    gross = merged['gross_amount'].to_numpy(dtype=np.float64)
+    allocated = merged['allocated'].to_numpy(dtype=np.float64)
+    merged['net_price'] = np.where(qty == 0, 0.0, (gross + sign * allocated) / np.where(qty == 0, 1.0, qty))
     return merged
 
 def _prepare_split_actions(corporate_actions_df, up_to_date=None):
@@ -454,6 +609,28 @@ def _prepare_split_actions(corporate_actions_df, up_to_date=None):
         actions[symbol].sort(key=lambda x: x[0])
     return actions
 
+# Lot queues use a struct-of-arrays layout: parallel qty/price arrays plus a
+# head cursor marking consumed lots. This replaces one dict + two boxed floats
+# per lot with two machine doubles, and makes FIFO consumption a cursor bump.
+
+def _new_lot_queue():
+    return {"qty": array('d'), "price": array('d'), "head": 0}
+
+def _lot_queue_compact(q):
+    # Reclaim consumed slots once they dominate the arrays.
+    head = q["head"]
+    if head >= 256 and head * 2 >= len(q["qty"]):
+        del q["qty"][:head]
+        del q["price"][:head]
+        q["head"] = 0
+
+def _lot_queue_to_batches(q):
+    head = q["head"]
+    return [
+        {"qty": qty, "price": price}
+        for qty, price in zip(q["qty"][head:], q["price"][head:])
+    ]
+
 def _apply_splits_to_lots(lots, split_actions, split_cursor, symbol, as_of_date):
     if symbol not in split_actions:
         return
@@ -462,12 +639,26 @@ def _apply_splits_to_lots(lots, split_actions, split_cursor, symbol, as_of_date)
     while idx < len(actions) and actions[idx][0] <= as_of_date:
         _, factor = actions[idx]
         if factor > 0:
-            for lot in lots.get(symbol, []):
-                lot["qty"] *= factor
-                lot["price"] /= factor
+            q = lots.get(symbol)
+            if q is not None:
+                qtys, prices = q["qty"], q["price"]
+                for k in range(q["head"], len(qtys)):
+                    qtys[k] *= factor
+                    prices[k] /= factor
         idx += 1
     split_cursor[symbol] = idx
 
+def _sort_trades_chronologically(df):
+    """Deterministic FIFO order: stable sort with a trade_id tie-break.
+
+    Same-date trades are the norm in broker tradebooks, and an unstable
+    date-only sort lets different entry points (and filter-then-sort vs
+    sort-then-filter paths) consume different lots for the same data.
+    """
+    if 'trade_id' in df.columns:
+        return df.sort_values(['date', 'trade_id'], kind='mergesort')
+    return df.sort_values('date', kind='mergesort')
+
 def calculate_fifo_holdings(trades_df, notes_df, up_to_date=None, include_charges=False, corporate_actions_df=None):
     """
     FIFO holdings from trades up to a given date (inclusive).
@@ -490,24 +681,42 @@ def calculate_fifo_holdings(trades_df, notes_df, up_to_date=None, include_charge
     split_actions = _prepare_split_actions(corporate_actions_df, up_to_date=up_to_date)
     split_cursor = {}
 
-    for _, row in merged.sort_values('date').iterrows():
-        sym = row['symbol']
-        if sym not in holdings:
-            holdings[sym] = []
-        _apply_splits_to_lots(holdings, split_actions, split_cursor, sym, row['date'])
-
-        if row['type'] == 'BUY':
-            holdings[sym].append({'qty': row['quantity'], 'price': row['net_price']})
-        elif row['type'] == 'SELL':
-            qty_to_sell = row['quantity']
-            while qty_to_sell > 0.0001 and holdings[sym]:
-                batch = holdings[sym][0]
-                if batch['qty'] > qty_to_sell:
-                    batch['qty'] -= qty_to_sell
+    # Pull plain ndarray columns once; iterrows() would allocate a Series per row.
+    merged = _sort_trades_chronologically(merged)
+    symbols = merged['symbol'].to_numpy()
+    types = merged['type'].to_numpy()
+    quantities = merged['quantity'].to_numpy(dtype=np.float64)
+    net_prices = merged['net_price'].to_numpy(dtype=np.float64)
+    dates = merged['date'].to_numpy()
+
+    # Split application is date-dependent, so only the common no-splits case
+    # goes through the compiled kernel.
+    if _fifo_realize_kernel is not None and not split_actions:
+        return _holdings_njit(symbols, types, quantities, net_prices)
+
+    for i in range(len(symbols)):
+        sym = symbols[i]
+        q = holdings.get(sym)
+        if q is None:
+            q = holdings[sym] = _new_lot_queue()
+        _apply_splits_to_lots(holdings, split_actions, split_cursor, sym, dates[i])
+
+        if types[i] == 'BUY':
+            q["qty"].append(quantities[i])
+            q["price"].append(net_prices[i])
+        elif types[i] == 'SELL':
+            qty_to_sell = quantities[i]
+            qtys = q["qty"]
+            head = q["head"]
+            while qty_to_sell > 0.0001 and head < len(qtys):
+                if qtys[head] > qty_to_sell:
+                    qtys[head] -= qty_to_sell
                     qty_to_sell = 0
                 else:
-                    qty_to_sell -= batch['qty']
-                    holdings[sym].pop(0)
+                    qty_to_sell -= qtys[head]
+                    head += 1
+            q["head"] = head
+            _lot_queue_compact(q)
 
     # Apply remaining split actions up to cutoff date even if no later trades occurred.
     # This is required for current holdings when no trade exists after the split date.
@@ -515,8 +724,188 @@ def calculate_fifo_holdings(trades_df, notes_df, up_to_date=None, include_charge
     for sym in holdings.keys():
         _apply_splits_to_lots(holdings, split_actions, split_cursor, sym, cutoff_date)
 
+    return {sym: _lot_queue_to_batches(q) for sym, q in holdings.items()}
+
+def calculate_fifo_holdings_snapshots(trades_df, notes_df, snapshot_dates, include_charges=False, corporate_actions_df=None):
+    """
+    Holdings snapshots at several cutoff dates from one chronological sweep.
+    Matches calculate_fifo_holdings at each cutoff — both walk trades in the
+    same deterministic order (_sort_trades_chronologically) — but costs
+    O(trades + snapshots * holdings) instead of re-matching FIFO per cutoff.
+    Returns {cutoff_date: {symbol: [{'qty': float, 'price': float}, ...]}}
+    """
+    snapshot_dates = sorted(snapshot_dates)
+    if not snapshot_dates:
+        return {}
+    if trades_df.empty:
+        return {d: {} for d in snapshot_dates}
+
+    if include_charges:
+        merged = _apply_allocations(trades_df, notes_df)
+    else:
+        merged = trades_df.copy()
+        merged['net_price'] = merged['price']
+
+    holdings = {}
+    split_actions = _prepare_split_actions(corporate_actions_df, up_to_date=snapshot_dates[-1])
+    split_cursor = {}
+
+    merged = _sort_trades_chronologically(merged)
+    symbols = merged['symbol'].to_numpy()
+    types = merged['type'].to_numpy()
+    quantities = merged['quantity'].to_numpy(dtype=np.float64)
+    net_prices = merged['net_price'].to_numpy(dtype=np.float64)
+    dates = merged['date'].to_numpy()
+
+    snapshots = {}
+    si = 0
+
+    def _take_snapshot(cutoff):
+        for sym in holdings.keys():
+            _apply_splits_to_lots(holdings, split_actions, split_cursor, sym, cutoff)
+        return {sym: _lot_queue_to_batches(q) for sym, q in holdings.items()}
+
+    for i in range(len(symbols)):
+        while si < len(snapshot_dates) and dates[i] > snapshot_dates[si]:
+            snapshots[snapshot_dates[si]] = _take_snapshot(snapshot_dates[si])
+            si += 1
+
+        sym = symbols[i]
+        q = holdings.get(sym)
+        if q is None:
+            q = holdings[sym] = _new_lot_queue()
+        _apply_splits_to_lots(holdings, split_actions, split_cursor, sym, dates[i])
+
+        if types[i] == 'BUY':
+            q["qty"].append(quantities[i])
+            q["price"].append(net_prices[i])
+        elif types[i] == 'SELL':
+            qty_to_sell = quantities[i]
+            qtys = q["qty"]
+            head = q["head"]
+            while qty_to_sell > 0.0001 and head < len(qtys):
+                if qtys[head] > qty_to_sell:
+                    qtys[head] -= qty_to_sell
+                    qty_to_sell = 0
+                else:
+                    qty_to_sell -= qtys[head]
+                    head += 1
+            q["head"] = head
+            _lot_queue_compact(q)
+
+    # Remaining cutoffs fall after the last trade.
+    while si < len(snapshot_dates):
+        snapshots[snapshot_dates[si]] = _take_snapshot(snapshot_dates[si])
+        si += 1
+
+    return snapshots
+
+def holdings_totals(holdings_dict):
+    """
+    Aggregate FIFO lot batches to {symbol: (total_qty, invested_value)}.
+    Uses NumPy reductions so callers don't re-sum the lot lists per use.
+    """
+    totals = {}
+    for sym, batches in holdings_dict.items():
+        n = len(batches)
+        qty_arr = np.fromiter((b['qty'] for b in batches), dtype=np.float64, count=n)
+        price_arr = np.fromiter((b['price'] for b in batches), dtype=np.float64, count=n)
+        totals[sym] = (float(qty_arr.sum()), float(np.dot(qty_arr, price_arr)))
+    return totals
+
+if njit is not None:
+    @njit(cache=True)
+    def _fifo_realize_kernel(codes, sides, qtys, prices, buy_rows, buy_starts, heads, rem):
+        # Typed FIFO state machine: per-symbol head cursors walk each symbol's
+        # chronological buy list. sides: 0=BUY, 1=SELL, 2=other.
+        n = codes.shape[0]
+        out_idx = np.empty(n, np.int64)
+        out_pnl = np.empty(n, np.float64)
+        out_avg = np.empty(n, np.float64)
+        m = 0
+        for i in range(n):
+            if sides[i] != 1:
+                continue
+            c = codes[i]
+            qty_to_sell = qtys[i]
+            sell_price = prices[i]
+            pnl = 0.0
+            cost = 0.0
+            bought = 0.0
+            h = heads[c]
+            end = buy_starts[c + 1]
+            while qty_to_sell > 0.0001 and h < end:
+                j = buy_rows[h]
+                if j > i:
+                    break  # lot not purchased yet at this point in the stream
+                take = rem[j] if rem[j] < qty_to_sell else qty_to_sell
+                pnl += (sell_price - prices[j]) * take
+                cost += prices[j] * take
+                bought += take
+                rem[j] -= take
+                qty_to_sell -= take
+                if rem[j] <= 0.0001:
+                    h += 1
+            heads[c] = h
+            out_idx[m] = i
+            out_pnl[m] = pnl
+            out_avg[m] = cost / bought if bought > 0 else 0.0
+            m += 1
+        return out_idx[:m], out_pnl[:m], out_avg[:m]
+else:
+    _fifo_realize_kernel = None
+
+def _fifo_kernel_inputs(symbols, types, quantities):
+    codes, uniques = pd.factorize(symbols)
+    codes = codes.astype(np.int64)
+    sides = np.where(types == 'BUY', 0, np.where(types == 'SELL', 1, 2)).astype(np.int8)
+    buy_rows = np.nonzero(sides == 0)[0]
+    # Stable sort groups each symbol's buys while preserving chronological order.
+    buy_rows = buy_rows[np.argsort(codes[buy_rows], kind='stable')].astype(np.int64)
+    n_sym = int(codes.max()) + 1 if codes.size else 0
+    counts = np.bincount(codes[buy_rows], minlength=n_sym)
+    buy_starts = np.zeros(n_sym + 1, dtype=np.int64)
+    np.cumsum(counts, out=buy_starts[1:])
+    heads = buy_starts[:-1].copy()
+    rem = quantities.copy()
+    return codes, uniques, sides, buy_rows, buy_starts, heads, rem
+
+def _holdings_njit(symbols, types, quantities, net_prices):
+    codes, uniques, sides, buy_rows, buy_starts, heads, rem = _fifo_kernel_inputs(
+        symbols, types, quantities
+    )
+    # The kernel's post-run state (per-symbol head cursors + remaining qty per
+    # buy row) is exactly the surviving lot queue.
+    _fifo_realize_kernel(codes, sides, quantities, net_prices, buy_rows, buy_starts, heads, rem)
+    holdings = {}
+    for c, sym in enumerate(uniques):
+        batches = []
+        for h in range(heads[c], buy_starts[c + 1]):
+            j = buy_rows[h]
+            if rem[j] > 0.0001:
+                batches.append({'qty': float(rem[j]), 'price': float(net_prices[j])})
+        holdings[sym] = batches
     return holdings
 
+def _realized_gains_njit(symbols, types, quantities, net_prices, dates):
+    codes, _, sides, buy_rows, buy_starts, heads, rem = _fifo_kernel_inputs(
+        symbols, types, quantities
+    )
+    idx, pnl, avg = _fifo_realize_kernel(
+        codes, sides, quantities, net_prices, buy_rows, buy_starts, heads, rem
+    )
+    return [
+        {
+            'symbol': symbols[i],
+            'sell_date': dates[i],
+            'sell_qty': quantities[i],
+            'sell_price': net_prices[i],
+            'avg_buy_price': avg[k],
+            'realized_pnl': pnl[k],
+        }
+        for k, i in enumerate(idx)
+    ]
+
 def calculate_realized_gains(trades_df, notes_df, include_charges=False, corporate_actions_df=None):
     """
     Returns list of realized gain records for each SELL trade using FIFO.
@@ -530,43 +919,59 @@ def calculate_realized_gains(trades_df, notes_df, include_charges=False, corpora
     else:
         merged = trades_df.copy()
         merged['net_price'] = merged['price']
-    merged = merged.sort_values('date')
+    merged = _sort_trades_chronologically(merged)
 
     lots = {}
     split_actions = _prepare_split_actions(corporate_actions_df, up_to_date=None)
     split_cursor = {}
     realized = []
 
-    for _, row in merged.iterrows():
-        sym = row['symbol']
-        if sym not in lots:
-            lots[sym] = []
-        _apply_splits_to_lots(lots, split_actions, split_cursor, sym, row['date'])
-
-        if row['type'] == 'BUY':
-            lots[sym].append({'qty': row['quantity'], 'price': row['net_price']})
-        elif row['type'] == 'SELL':
-            qty_to_sell = row['quantity']
-            sell_price = row['net_price']
+    symbols = merged['symbol'].to_numpy()
+    types = merged['type'].to_numpy()
+    quantities = merged['quantity'].to_numpy(dtype=np.float64)
+    net_prices = merged['net_price'].to_numpy(dtype=np.float64)
+    dates = merged['date'].to_numpy()
+
+    # Split application is date-dependent, so only the common no-splits case
+    # goes through the compiled kernel.
+    if _fifo_realize_kernel is not None and not split_actions:
+        return _realized_gains_njit(symbols, types, quantities, net_prices, dates)
+
+    for i in range(len(symbols)):
+        sym = symbols[i]
+        q = lots.get(sym)
+        if q is None:
+            q = lots[sym] = _new_lot_queue()
+        _apply_splits_to_lots(lots, split_actions, split_cursor, sym, dates[i])
+
+        if types[i] == 'BUY':
+            q["qty"].append(quantities[i])
+            q["price"].append(net_prices[i])
+        elif types[i] == 'SELL':
+            qty_to_sell = quantities[i]
+            sell_price = net_prices[i]
             realized_pnl = 0.0
             total_buy_cost = 0.0
             total_buy_qty = 0.0
 
-            while qty_to_sell > 0.0001 and lots[sym]:
-                batch = lots[sym][0]
-                take_qty = min(batch['qty'], qty_to_sell)
-                realized_pnl += (sell_price - batch['price']) * take_qty
-                total_buy_cost += batch['price'] * take_qty
+            qtys, prices = q["qty"], q["price"]
+            head = q["head"]
+            while qty_to_sell > 0.0001 and head < len(qtys):
+                take_qty = min(qtys[head], qty_to_sell)
+                realized_pnl += (sell_price - prices[head]) * take_qty
+                total_buy_cost += prices[head] * take_qty
                 total_buy_qty += take_qty
-                batch['qty'] -= take_qty
+                qtys[head] -= take_qty
                 qty_to_sell -= take_qty
-                if batch['qty'] <= 0.0001:
-                    lots[sym].pop(0)
+                if qtys[head] <= 0.0001:
+                    head += 1
+            q["head"] = head
+            _lot_queue_compact(q)
 
             realized.append({
                 'symbol': sym,
-                'sell_date': row['date'],
-                'sell_qty': row['quantity'],
+                'sell_date': dates[i],
+                'sell_qty': quantities[i],
                 'sell_price': sell_price,
                 'avg_buy_price': (total_buy_cost / total_buy_qty) if total_buy_qty > 0 else 0.0,
                 'realized_pnl': realized_pnl
@@ -582,36 +987,45 @@ def detect_unmatched_sells(trades_df):
     if trades_df.empty:
         return []
 
-    df = trades_df.sort_values('date')
+    df = _sort_trades_chronologically(trades_df)
     lots = {}
     unmatched = []
 
-    for _, row in df.iterrows():
-        sym = row['symbol']
-        if sym not in lots:
-            lots[sym] = []
+    symbols = df['symbol'].to_numpy()
+    types = df['type'].to_numpy()
+    quantities = df['quantity'].to_numpy(dtype=np.float64)
+    dates = df['date'].to_numpy()
 
-        if row['type'] == 'BUY':
-            lots[sym].append({'qty': float(row['quantity'])})
+    for i in range(len(symbols)):
+        sym = symbols[i]
+        q = lots.get(sym)
+        if q is None:
+            q = lots[sym] = _new_lot_queue()
+
+        if types[i] == 'BUY':
+            q["qty"].append(quantities[i])
             continue
 
-        if row['type'] != 'SELL':
+        if types[i] != 'SELL':
             continue
 
-        qty_to_sell = float(row['quantity'])
-        while qty_to_sell > 0.0001 and lots[sym]:
-            batch = lots[sym][0]
-            take_qty = min(batch['qty'], qty_to_sell)
-            batch['qty'] -= take_qty
+        qty_to_sell = quantities[i]
+        qtys = q["qty"]
+        head = q["head"]
+        while qty_to_sell > 0.0001 and head < len(qtys):
+            take_qty = min(qtys[head], qty_to_sell)
+            qtys[head] -= take_qty
             qty_to_sell -= take_qty
-            if batch['qty'] <= 0.0001:
-                lots[sym].pop(0)
+            if qtys[head] <= 0.0001:
+                head += 1
+        q["head"] = head
+        _lot_queue_compact(q)
 
         if qty_to_sell > 0.0001:
             unmatched.append({
                 "symbol": sym,
-                "sell_date": row['date'],
-                "sell_qty": float(row['quantity']),
+                "sell_date": dates[i],
+                "sell_qty": quantities[i],
                 "unmatched_qty": round(float(qty_to_sell), 4),
             })
 
@@ -620,3 +1034,11 @@ def detect_unmatched_sells(trades_df):
 def fy_label(d: date):
     year = d.year + 1 if d.month >= 4 else d.year
     return f"FY{year}"
+
+def fy_label_vec(dates):
+    """
+    Vectorized fy_label over a date column: returns the FY year per row as an
+    int ndarray. Callers format "FY{year}" labels at the presentation edge.
+    """
+    idx = pd.DatetimeIndex(pd.to_datetime(dates))
+    return np.where(idx.month >= 4, idx.year + 1, idx.year)
@@ -1,11 +1,16 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, Boolean
+from sqlalchemy import create_engine, text, Column, Integer, String, Float, Date, DateTime, Boolean, Index, LargeBinary
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://admin:password@db:5432/zerodha_db")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# values_plus_batch pipelines multi-row INSERTs on psycopg2 instead of one
+# round-trip per row; pre-ping drops dead pooled connections instead of
+# failing the first statement after an idle period.
+engine = create_engine(DATABASE_URL, executemany_mode="values_plus_batch", pool_pre_ping=True)
+# expire_on_commit off: endpoints only read ORM attributes they set
+# themselves after commit, so there's no need to re-SELECT state.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 class ContractNote(Base):
@@ -37,6 +42,10 @@ class Trade(Base):
     price = Column(Float)
     gross_amount = Column(Float)
 
+    # FIFO reads trades ordered by (symbol, date); the composite index lets
+    # Postgres return them in index order without a filesort.
+    __table_args__ = (Index("ix_trades_symbol_date", "symbol", "date"),)
+
 class UploadBatch(Base):
     __tablename__ = "upload_batches"
 
@@ -48,6 +57,9 @@ class UploadBatch(Base):
     tradebook_filename = Column(String)
     contract_filenames = Column(JSONB)
 
+    # Staged row lists live in one compressed JSON blob; the four JSONB
+    # columns remain readable for batches staged before the blob existed.
+    payload_blob = Column(LargeBinary, nullable=True)
     trade_rows = Column(JSONB)
     contract_rows = Column(JSONB)
     contract_trade_rows = Column(JSONB)
@@ -73,6 +85,9 @@ class ContractNoteTrade(Base):
     sheet_name = Column(String, nullable=True)
     file_name = Column(String, nullable=True)
 
+    # Reconciliation filters by (trade_date, contract_note_no).
+    __table_args__ = (Index("ix_cnt_date_no", "trade_date", "contract_note_no"),)
+
 class ContractNoteCharge(Base):
     __tablename__ = "contract_note_charges"
 
@@ -115,5 +130,65 @@ class CorporateAction(Base):
     fetched_at = Column(DateTime, nullable=True)
     active = Column(Boolean, default=True)
 
+    # The sync's insert-vs-update check matches on the full action identity;
+    # this keeps it an index lookup as the table grows. Not a unique
+    # constraint: the ratio columns are nullable and Postgres treats NULLs
+    # as distinct, so uniqueness is enforced in the sync logic instead.
+    __table_args__ = (
+        Index(
+            "ix_corp_act_identity",
+            "symbol", "action_type", "effective_date",
+            "ratio_from", "ratio_to", "active",
+        ),
+    )
+
+class RealizedLot(Base):
+    __tablename__ = "realized_lots"
+
+    # Derived data: one row per SELL as produced by calculate_realized_gains.
+    # Rebuilt wholesale whenever FIFO inputs change (ingest commit, alias
+    # upsert, corporate-action sync); report endpoints read it by fy instead
+    # of re-running FIFO over every trade per request.
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, index=True, nullable=False)
+    sell_date = Column(Date, nullable=False)
+    fy = Column(String, index=True, nullable=False)
+    sell_qty = Column(Float)
+    sell_price = Column(Float)
+    avg_buy_price = Column(Float)
+    realized_pnl = Column(Float)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all only adds columns when it creates the whole table, so
+    # deployments whose upload_batches predates the compressed blob would
+    # otherwise fail every staging SELECT/INSERT with UndefinedColumn.
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE upload_batches ADD COLUMN IF NOT EXISTS payload_blob BYTEA"
+        ))
+        # Likewise for indexes: the composite indexes declared in
+        # __table_args__ only materialize with a brand-new table, so build
+        # them explicitly for databases created before they were declared.
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_trades_symbol_date"
+            " ON trades (symbol, date)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_cnt_date_no"
+            " ON contract_note_trades (trade_date, contract_note_no)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_corp_act_identity"
+            " ON corporate_actions (symbol, action_type, effective_date,"
+            " ratio_from, ratio_to, active)"
+        ))
+
+def bulk_insert(session, model, rows):
+    """Insert pre-built row dicts as batched multi-row statements.
+
+    Replaces per-row session.add() in bulk ingest paths; rows must already
+    match the model's column names.
+    """
+    if rows:
+        session.bulk_insert_mappings(model, rows)
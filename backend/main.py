@@ -1,8 +1,10 @@
-from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, tuple_, func, select, case
 import pandas as pd
+import numpy as np
 import yfinance as yf
 import logging
 import warnings
@@ -10,11 +12,17 @@ import time
 import os
 from datetime import datetime, date
 import uuid
-import math
+import json
+import zlib
+import copy
+from collections import OrderedDict
+import threading
+import asyncio
 from typing import Optional, List
 from database import (
     SessionLocal,
     init_db,
+    bulk_insert,
     Trade,
     ContractNote,
     UploadBatch,
@@ -22,20 +30,28 @@ from database import (
     ContractNoteCharge,
     SymbolAlias,
     CorporateAction,
+    RealizedLot,
 )
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from core import (
     parse_contract_note,
+    _parse_contract_note_seq,
     parse_tradebook,
     calculate_fifo_holdings,
+    calculate_fifo_holdings_snapshots,
+    holdings_totals,
     calculate_realized_gains,
     detect_unmatched_sells,
     fy_label,
+    fy_label_vec,
 )
 from tax import calculate_tax_report
 from tax.registry import supported_countries
 from tax.types import TaxReportRequest
 
-app = FastAPI()
+# orjson renders the large holdings/report payloads several times faster
+# than stdlib json; NaN/inf floats become null instead of invalid JSON.
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Quiet noisy third-party logs/warnings (yfinance delisting/no-data chatter).
 logging.getLogger("yfinance").setLevel(logging.ERROR)
@@ -67,61 +83,164 @@ def get_db():
 # Removed timing logs
 
 # Simple in-memory cache for live prices to avoid repeated yfinance calls.
-# Keyed by the requested symbols + their mapped tickers to stay consistent.
+# Keyed per ticker so a one-symbol portfolio change only refetches that
+# symbol; price None records a known-missing ticker for the TTL window.
 _PRICE_CACHE = {}
 _PRICE_CACHE_TTL_SEC = 600
-_INGEST_PROGRESS = {}
+_PRICE_CACHE_MAX = 512
+# Cache entries are mirrored to disk so a backend restart doesn't cold-start
+# straight into a multi-second yf.download.
+_PRICE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".price_cache.json")
+_PRICE_FETCH_LOCK = threading.Lock()
+# Single-flight bookkeeping: tickers currently being downloaded by some
+# request thread. Others skip those tickers and wait on the condition for
+# the overlap to land, so disjoint symbol sets fetch in parallel while the
+# thundering herd on a shared expired ticker collapses to one download.
+_PRICE_INFLIGHT = set()
+_PRICE_FETCH_COND = threading.Condition(_PRICE_FETCH_LOCK)
+
+# Optional HTTP-level cache under the yfinance calls: repeated Yahoo requests
+# (quotes and split history) are answered from a local sqlite store for 15
+# minutes, which also survives restarts. The in-memory caches above still
+# front this; the session only softens cold starts. Optional dependency,
+# handled like numba in core.
+try:
+    from requests_cache import CachedSession
+    _YF_SESSION = CachedSession(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".yf_http_cache"),
+        expire_after=900,
+    )
+except ImportError:
+    _YF_SESSION = None
+
+def _load_price_cache_file():
+    try:
+        with open(_PRICE_CACHE_FILE) as f:
+            raw = json.load(f)
+    except Exception:
+        return
+    now = time.time()
+    for ticker, entry in raw.items():
+        if now - entry.get("ts", 0) <= _PRICE_CACHE_TTL_SEC:
+            _PRICE_CACHE[ticker] = entry
 
-def _progress_update(progress_id: Optional[str], **fields):
+def _save_price_cache_file():
+    try:
+        tmp_path = f"{_PRICE_CACHE_FILE}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(_PRICE_CACHE, f)
+        os.replace(tmp_path, _PRICE_CACHE_FILE)
+    except Exception as e:
+        _user_log(f"[PriceCache] persist failed: {e}")
+
+_load_price_cache_file()
+# Splits are append-only public data, so one fetch per ticker per day is
+# plenty: cache the parsed (effective_date, ratio) pairs keyed by ticker and
+# reuse them until the calendar day rolls over. Errors are never cached.
+_SPLITS_CACHE = {}
+_SPLITS_CACHE_LOCK = threading.Lock()
+_ALIAS_CACHE = {"ts": 0.0, "map": {}}
+_ALIAS_CACHE_TTL_SEC = 300
+_INGEST_PROGRESS = {}
+# Progress rows are only polled while an upload is in flight; prune anything
+# stale so the dict can't grow for the process lifetime.
+_INGEST_PROGRESS_TTL_SEC = 3600
+_INGEST_PROGRESS_MAX = 1000
+# High-frequency sources (per-sheet callbacks) coalesce to at most one write
+# per interval; stage transitions and terminal updates always land.
+_INGEST_PROGRESS_MIN_INTERVAL_SEC = 0.1
+
+def _prune_ingest_progress(now_ts: float):
+    cutoff = now_ts - _INGEST_PROGRESS_TTL_SEC
+    stale = [pid for pid, row in _INGEST_PROGRESS.items() if row.get("_ts", 0) < cutoff]
+    for pid in stale:
+        _INGEST_PROGRESS.pop(pid, None)
+    if len(_INGEST_PROGRESS) > _INGEST_PROGRESS_MAX:
+        for pid in sorted(_INGEST_PROGRESS, key=lambda p: _INGEST_PROGRESS[p].get("_ts", 0))[
+            : len(_INGEST_PROGRESS) - _INGEST_PROGRESS_MAX
+        ]:
+            _INGEST_PROGRESS.pop(pid, None)
+
+def _progress_update(progress_id: Optional[str], _coalesce: bool = False, **fields):
     if not progress_id:
         return
+    now_ts = time.time()
     current = _INGEST_PROGRESS.get(progress_id, {})
+    if _coalesce and current and now_ts - current.get("_ts", 0.0) < _INGEST_PROGRESS_MIN_INTERVAL_SEC:
+        return
     current.update(fields)
-    current["updated_at"] = datetime.utcnow().isoformat()
+    # Timestamp stays a float here; the progress endpoint formats it on read.
+    current["_ts"] = now_ts
     _INGEST_PROGRESS[progress_id] = current
-
-def _fetch_yfinance_split_actions(symbol: str, start_date: date, end_date: date):
-    actions = []
-    errors = []
-
-    for suffix in [".NS", ".BO"]:
-        ticker = f"{symbol}{suffix}"
-        try:
-            t = yf.Ticker(ticker)
-            splits = t.splits
-            if splits is None or len(splits) == 0:
+    _prune_ingest_progress(now_ts)
+
+def _ticker_splits_cached(ticker: str):
+    """Return the parsed (effective_date, ratio) list for a ticker, fetching
+    from yfinance at most once per calendar day. Thread-safe."""
+    today = date.today()
+    with _SPLITS_CACHE_LOCK:
+        cached = _SPLITS_CACHE.get(ticker)
+        if cached and cached[0] == today:
+            return cached[1]
+    items = []
+    splits = yf.Ticker(ticker, session=_YF_SESSION).splits
+    if splits is not None and len(splits) > 0:
+        for ts, ratio in splits.items():
+            eff_date = pd.to_datetime(ts, errors="coerce").date()
+            if eff_date is None or pd.isna(eff_date):
                 continue
-            for ts, ratio in splits.items():
-                eff_date = pd.to_datetime(ts, errors="coerce").date()
-                if eff_date is None or pd.isna(eff_date):
-                    continue
-                if eff_date < start_date or eff_date > end_date:
-                    continue
-                try:
-                    ratio_val = float(ratio)
-                except Exception:
-                    continue
-                if ratio_val <= 0 or abs(ratio_val - 1.0) < 1e-9:
-                    continue
-                actions.append({
-                    "symbol": symbol,
-                    "action_type": "SPLIT",
-                    "effective_date": eff_date,
-                    "ratio_from": 1.0,
-                    "ratio_to": ratio_val,
-                    "source": "YFINANCE",
-                    "source_ref": ticker,
-                })
-        except Exception as e:
-            errors.append(f"YFinance fetch failed for {ticker}: {str(e)}")
-
+            try:
+                ratio_val = float(ratio)
+            except Exception:
+                continue
+            if ratio_val <= 0 or abs(ratio_val - 1.0) < 1e-9:
+                continue
+            items.append((eff_date, ratio_val))
+    with _SPLITS_CACHE_LOCK:
+        _SPLITS_CACHE[ticker] = (today, items)
+    return items
+
+def _fetch_yfinance_ticker_splits(symbol: str, suffix: str, start_date: date, end_date: date):
+    """Fetch splits for one (symbol, suffix) ticker. Thread-safe: pure
+    network call plus local post-processing, no shared state."""
+    ticker = f"{symbol}{suffix}"
+    actions = []
+    try:
+        items = _ticker_splits_cached(ticker)
+    except Exception as e:
+        return actions, f"YFinance fetch failed for {ticker}: {str(e)}"
+    for eff_date, ratio_val in items:
+        if eff_date < start_date or eff_date > end_date:
+            continue
+        actions.append({
+            "symbol": symbol,
+            "action_type": "SPLIT",
+            "effective_date": eff_date,
+            "ratio_from": 1.0,
+            "ratio_to": ratio_val,
+            "source": "YFINANCE",
+            "source_ref": ticker,
+        })
+    return actions, None
+
+def _dedupe_split_actions(actions):
     # Deduplicate by (date, ratio) across NS/BO.
     uniq = {}
     for a in actions:
         key = (a["effective_date"], a["ratio_from"], a["ratio_to"])
         if key not in uniq:
             uniq[key] = a
-    return list(uniq.values()), (None if not errors else "; ".join(errors[:4]))
+    return list(uniq.values())
+
+def _fetch_yfinance_split_actions(symbol: str, start_date: date, end_date: date):
+    actions = []
+    errors = []
+    for suffix in [".NS", ".BO"]:
+        found, err = _fetch_yfinance_ticker_splits(symbol, suffix, start_date, end_date)
+        actions.extend(found)
+        if err:
+            errors.append(err)
+    return _dedupe_split_actions(actions), (None if not errors else "; ".join(errors[:4]))
 
 def _sync_corporate_actions_for_symbols(db: Session, symbols: list[str], start_dates_by_symbol: dict[str, date]):
     synced = 0
@@ -129,6 +248,40 @@ def _sync_corporate_actions_for_symbols(db: Session, symbols: list[str], start_d
     warnings = []
     end_date = date.today()
 
+    # One prefetch instead of a SELECT per fetched action; insert-vs-update
+    # is then decided in memory.
+    existing_map = {}
+    if symbols:
+        for r in db.query(CorporateAction).filter(
+            CorporateAction.symbol.in_(set(symbols)),
+            CorporateAction.active == True,
+        ):
+            existing_map[(r.symbol, r.action_type, r.effective_date, r.ratio_from, r.ratio_to)] = r
+    new_rows = []
+
+    # The fetch loop is network-bound (two HTTP calls per symbol, GIL
+    # released during I/O), so all (symbol, suffix) pairs go out on one
+    # bounded thread pool; dedupe and DB merging stay on this thread.
+    fetchable = [s for s in sorted(set(symbols)) if start_dates_by_symbol.get(s)]
+    raw_by_symbol = {s: [] for s in fetchable}
+    errs_by_symbol = {s: [] for s in fetchable}
+    if fetchable:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = {
+                pool.submit(
+                    _fetch_yfinance_ticker_splits,
+                    s, suffix, start_dates_by_symbol[s], end_date,
+                ): s
+                for s in fetchable
+                for suffix in [".NS", ".BO"]
+            }
+            for fut in as_completed(futures):
+                s = futures[fut]
+                found, err = fut.result()
+                raw_by_symbol[s].extend(found)
+                if err:
+                    errs_by_symbol[s].append(err)
+
     for symbol in sorted(set(symbols)):
         start_date = start_dates_by_symbol.get(symbol)
         if not start_date:
@@ -136,7 +289,8 @@ def _sync_corporate_actions_for_symbols(db: Session, symbols: list[str], start_d
             per_symbol.append({"symbol": symbol, "added": 0})
             continue
 
-        yf_actions, yf_err = _fetch_yfinance_split_actions(symbol, start_date, end_date)
+        yf_actions = _dedupe_split_actions(raw_by_symbol[symbol])
+        yf_err = "; ".join(errs_by_symbol[symbol][:4]) or None
         _user_log(
             f"[CorpSync] {symbol}: range={start_date.isoformat()}..{end_date.isoformat()} "
             f"YF={len(yf_actions)}"
@@ -148,36 +302,35 @@ def _sync_corporate_actions_for_symbols(db: Session, symbols: list[str], start_d
         actions = yf_actions
         added = 0
         for a in actions:
-            existing = db.query(CorporateAction).filter(
-                CorporateAction.symbol == a["symbol"],
-                CorporateAction.action_type == a["action_type"],
-                CorporateAction.effective_date == a["effective_date"],
-                CorporateAction.ratio_from == a["ratio_from"],
-                CorporateAction.ratio_to == a["ratio_to"],
-                CorporateAction.active == True,
-            ).first()
+            key = (a["symbol"], a["action_type"], a["effective_date"], a["ratio_from"], a["ratio_to"])
+            existing = existing_map.get(key)
             if existing:
                 existing.source = a.get("source") or existing.source
                 existing.source_ref = a.get("source_ref") or existing.source_ref
                 existing.fetched_at = datetime.utcnow()
             else:
-                db.add(CorporateAction(
-                    symbol=a["symbol"],
-                    action_type=a["action_type"],
-                    effective_date=a["effective_date"],
-                    ratio_from=a["ratio_from"],
-                    ratio_to=a["ratio_to"],
-                    source=a.get("source"),
-                    source_ref=a.get("source_ref"),
-                    fetched_at=datetime.utcnow(),
-                    active=True,
-                ))
+                new_rows.append({
+                    "symbol": a["symbol"],
+                    "action_type": a["action_type"],
+                    "effective_date": a["effective_date"],
+                    "ratio_from": a["ratio_from"],
+                    "ratio_to": a["ratio_to"],
+                    "source": a.get("source"),
+                    "source_ref": a.get("source_ref"),
+                    "fetched_at": datetime.utcnow(),
+                    "active": True,
+                })
                 added += 1
         synced += added
         _user_log(f"[CorpSync] {symbol}: added_or_updated={added}")
         per_symbol.append({"symbol": symbol, "added": added})
 
+    bulk_insert(db, CorporateAction, new_rows)
     db.commit()
+    if new_rows:
+        # New splits change FIFO results and the cached actions frame.
+        _bump_trades_version()
+        _rebuild_realized_table(db)
     _user_log(f"[CorpSync] done symbols={len(set(symbols))} total_added={synced}")
     return {
         "symbols_checked": len(set(symbols)),
@@ -186,15 +339,86 @@ def _sync_corporate_actions_for_symbols(db: Session, symbols: list[str], start_d
         "warnings": warnings[:20],
     }
 
+# Table reads repeat identically across dashboard/report hits on a mostly
+# append-only dataset. Frames are cached per (name, trades version) with a
+# short TTL; the version bump on any write clears the cache. Returning the
+# cached frame directly is safe under pandas Copy-on-Write — callers that
+# assign columns trigger their own copy.
+_DF_CACHE = {}
+_DF_CACHE_TTL_SEC = 60
+
+# Core selects built once at import: the readers hand pandas a ready
+# selectable instead of compiling an ORM Query per call. Dates come back as
+# python date objects straight from the driver — no parse_dates pass needed,
+# and downstream code keys snapshots on those objects.
+_TRADES_SELECT = select(
+    Trade.trade_id, Trade.symbol, Trade.isin, Trade.date,
+    Trade.type, Trade.quantity, Trade.price, Trade.gross_amount,
+)
+_NOTES_SELECT = select(
+    ContractNote.date, ContractNote.total_brokerage, ContractNote.total_taxes,
+    ContractNote.total_other_charges, ContractNote.net_total_paid,
+)
+_CORP_ACTIONS_SELECT = select(
+    CorporateAction.symbol, CorporateAction.action_type,
+    CorporateAction.effective_date, CorporateAction.ratio_from,
+    CorporateAction.ratio_to, CorporateAction.source,
+    CorporateAction.source_ref,
+).where(CorporateAction.active == True)
+# /reports/summary only rolls up the per-trade charge columns by date.
+_CHARGES_SELECT = select(
+    ContractNoteCharge.trade_date,
+    ContractNoteCharge.exchange_txn_charges, ContractNoteCharge.clearing_charges,
+    ContractNoteCharge.cgst, ContractNoteCharge.sgst, ContractNoteCharge.igst,
+    ContractNoteCharge.stt, ContractNoteCharge.sebi_txn_tax,
+    ContractNoteCharge.stamp_duty,
+)
+
+def _cached_df(name: str, loader):
+    now = time.time()
+    key = (name, _TRADES_VERSION)
+    entry = _DF_CACHE.get(key)
+    if entry and now - entry["ts"] <= _DF_CACHE_TTL_SEC:
+        return entry["df"]
+    df = loader()
+    _DF_CACHE[key] = {"ts": now, "df": df}
+    return df
+
 def _load_corporate_actions_df(db: Session):
-    return pd.read_sql(
-        db.query(CorporateAction).filter(CorporateAction.active == True).statement,
-        db.bind
-    )
+    return _cached_df("corporate_actions", lambda: _read_corporate_actions_df(db))
+
+def _read_corporate_actions_df(db: Session):
+    # Column-pruned like _load_trades_df: consumers only look at the split
+    # definition itself, so id/fetched_at/active never leave the database
+    # (the active filter already guarantees active rows).
+    df = pd.read_sql_query(_CORP_ACTIONS_SELECT, db.bind)
+    # Upper-case once here; downstream filters compare these columns as-is.
+    df["symbol"] = df["symbol"].astype(str).str.upper()
+    df["action_type"] = df["action_type"].astype(str).str.upper()
+    return df
+
+def _load_trades_df(db: Session):
+    return _cached_df("trades", lambda: _read_trades_df(db))
+
+def _read_trades_df(db: Session):
+    # Column-pruned load: skips the surrogate id pk so pandas builds one
+    # fewer object column per row on the big table.
+    df = pd.read_sql_query(_TRADES_SELECT, db.bind)
+    # Same trick as parse_tradebook: symbols/sides repeat heavily, so keep
+    # them categorical and let groupbys/comparisons run on integer codes.
+    df['symbol'] = df['symbol'].astype('category')
+    df['type'] = df['type'].astype('category')
+    # Derived once per load instead of once per request: the FY year each
+    # trade falls in, for the endpoints that enumerate FYs.
+    df['fy_year'] = fy_label_vec(df['date'])
+    return df
+
+def _load_notes_df(db: Session):
+    return _cached_df("notes", lambda: pd.read_sql_query(_NOTES_SELECT, db.bind))
 
 def _to_fifo_trade_df(trades_df: pd.DataFrame):
     if trades_df is None or trades_df.empty:
-        return pd.DataFrame(columns=["symbol", "date", "type", "quantity", "price"])
+        return pd.DataFrame(columns=["trade_id", "symbol", "date", "type", "quantity", "price"])
     df = trades_df.copy()
     if "date" not in df.columns and "trade_date" in df.columns:
         df["date"] = pd.to_datetime(df["trade_date"]).dt.date
@@ -202,11 +426,18 @@ def _to_fifo_trade_df(trades_df: pd.DataFrame):
         df["date"] = pd.to_datetime(df["date"]).dt.date
     if "type" not in df.columns and "trade_type" in df.columns:
         df["type"] = df["trade_type"]
-    cols = ["symbol", "date", "type", "quantity", "price"]
+    # trade_id rides along as the FIFO tie-break for same-date trades.
+    cols = ["trade_id", "symbol", "date", "type", "quantity", "price"]
     for c in cols:
         if c not in df.columns:
             df[c] = None
-    return df[cols].copy()
+    df = df[cols].copy()
+    # Normalize case once at the boundary so downstream consumers compare
+    # directly instead of re-upper-casing per use; categorical for the same
+    # reason as _read_trades_df (groupbys run on integer codes).
+    df["symbol"] = df["symbol"].astype(str).str.upper().astype("category")
+    df["type"] = df["type"].astype(str).str.upper().astype("category")
+    return df
 
 def _log_split_impacts_for_preview(fifo_trades_df: pd.DataFrame, corporate_actions_df: pd.DataFrame):
     if fifo_trades_df is None or fifo_trades_df.empty:
@@ -216,93 +447,134 @@ def _log_split_impacts_for_preview(fifo_trades_df: pd.DataFrame, corporate_actio
         _user_log("[SplitCheck] No corporate actions available in DB.")
         return []
 
-    actions_df = corporate_actions_df.copy()
-    actions_df["action_type"] = actions_df["action_type"].astype(str).str.upper()
-    actions_df = actions_df[actions_df["action_type"] == "SPLIT"]
+    # Both inputs arrive case-normalized (_to_fifo_trade_df plus alias
+    # resolution for trades, _load_corporate_actions_df for actions), so no
+    # per-column re-upper-casting here.
+    actions_df = corporate_actions_df[corporate_actions_df["action_type"] == "SPLIT"].copy()
     if actions_df.empty:
         _user_log("[SplitCheck] No split actions available in DB.")
         return []
 
     actions_df["effective_date"] = pd.to_datetime(actions_df["effective_date"], errors="coerce").dt.date
     actions_df = actions_df[actions_df["effective_date"].notna()]
-    actions_df["symbol"] = actions_df["symbol"].astype(str).str.upper()
 
-    buys = fifo_trades_df[fifo_trades_df["type"].astype(str).str.upper() == "BUY"].copy()
+    buys = fifo_trades_df[fifo_trades_df["type"] == "BUY"].copy()
     if buys.empty:
         _user_log("[SplitCheck] No BUY rows in preview.")
         return []
 
-    buys["symbol"] = buys["symbol"].astype(str).str.upper()
     buys["date"] = pd.to_datetime(buys["date"], errors="coerce").dt.date
-    first_buy_by_symbol = buys.groupby("symbol")["date"].min().to_dict()
+    first_buy_by_symbol = buys.groupby("symbol", observed=True)["date"].min().to_dict()
 
     _user_log("[SplitCheck] ----- Split Impact Check (Preview) -----")
-    empty_notes_df = pd.DataFrame(columns=["date"])
     any_logged = False
     impact_rows = []
 
+    trade_symbols = fifo_trades_df["symbol"]
+
+    # One hash-join plus groupby instead of a boolean scan of the actions
+    # frame per symbol.
+    fb_df = pd.DataFrame({
+        "symbol": list(first_buy_by_symbol.keys()),
+        "first_buy_date": list(first_buy_by_symbol.values()),
+    })
+    merged = actions_df.merge(fb_df, on="symbol", how="inner")
+    merged = merged[merged["effective_date"] >= merged["first_buy_date"]]
+    merged = merged.sort_values(["symbol", "effective_date"])
+    actions_by_symbol = {sym: grp for sym, grp in merged.groupby("symbol", sort=False)}
+
     for symbol in sorted(first_buy_by_symbol.keys()):
         first_buy_date = first_buy_by_symbol[symbol]
-        symbol_actions = actions_df[
-            (actions_df["symbol"] == symbol) &
-            (actions_df["effective_date"] >= first_buy_date)
-        ].sort_values("effective_date")
+        symbol_actions = actions_by_symbol.get(symbol)
 
-        if symbol_actions.empty:
+        if symbol_actions is None or symbol_actions.empty:
             _user_log(f"[SplitCheck] {symbol} first_buy={first_buy_date.isoformat()} split_count=0")
             continue
 
-        symbol_trades = fifo_trades_df[fifo_trades_df["symbol"].astype(str).str.upper() == symbol].copy()
+        symbol_trades = fifo_trades_df[trade_symbols == symbol]
         if symbol_trades.empty:
             continue
 
         _user_log(f"[SplitCheck] {symbol} first_buy={first_buy_date.isoformat()} split_count={len(symbol_actions)}")
-        for _, action in symbol_actions.iterrows():
-            eff = action["effective_date"]
-            r_from = action.get("ratio_from")
-            r_to = action.get("ratio_to")
-            if r_from is None or r_to is None:
-                _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio=unknown (skipped)")
-                continue
-            try:
-                r_from = float(r_from)
-                r_to = float(r_to)
-            except Exception:
-                _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio_invalid={r_from}:{r_to} (skipped)")
-                continue
-            if r_from <= 0 or r_to <= 0:
-                _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio_non_positive={r_from}:{r_to} (skipped)")
-                continue
 
-            prior_actions = symbol_actions[symbol_actions["effective_date"] < eff]
-            holdings_before = calculate_fifo_holdings(
-                symbol_trades,
-                empty_notes_df,
-                up_to_date=eff,
-                corporate_actions_df=prior_actions,
-            )
-            lots = holdings_before.get(symbol, [])
-            qty_before = float(sum(l.get("qty", 0.0) for l in lots))
-            factor = r_to / r_from
-            qty_after = qty_before * factor
-            delta = qty_after - qty_before
-            _user_log(
-                f"[SplitCheck]   split={eff.isoformat()} ratio={r_from:g}:{r_to:g} "
-                f"affected_qty={qty_before:.4f} -> {qty_after:.4f} (delta={delta:+.4f})"
-            )
-            impact_rows.append({
-                "symbol": symbol,
-                "first_buy_date": first_buy_date.isoformat(),
-                "split_date": eff.isoformat(),
-                "ratio_from": r_from,
-                "ratio_to": r_to,
-                "qty_before": round(qty_before, 4),
-                "qty_after": round(qty_after, 4),
-                "delta_qty": round(delta, 4),
-                "source": action.get("source"),
-                "source_ref": action.get("source_ref"),
-            })
-            any_logged = True
+        # Only the held total matters here, so one chronological walk per
+        # symbol tracks the split-adjusted quantity and reads it off at each
+        # split date — rather than re-running full FIFO once per split.
+        # Same stable order + trade_id tie-break as the core FIFO walks, so
+        # the logged impact matches what FIFO will actually consume.
+        st = symbol_trades.sort_values(["date", "trade_id"], kind="mergesort")
+        t_dates = pd.to_datetime(st["date"], errors="coerce").dt.date.to_numpy()
+        t_types = st["type"].to_numpy()
+        t_qtys = pd.to_numeric(st["quantity"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+        n_trades = len(t_dates)
+
+        def _roll_trades(qty, start, end):
+            for j in range(start, end):
+                if t_types[j] == "BUY":
+                    qty += t_qtys[j]
+                elif t_types[j] == "SELL":
+                    qty = max(qty - t_qtys[j], 0.0)
+            return qty
+
+        held = 0.0
+        ti = 0
+        for eff, grp in symbol_actions.groupby("effective_date", sort=True):
+            while ti < n_trades and t_dates[ti] < eff:
+                held = _roll_trades(held, ti, ti + 1)
+                ti += 1
+            same_end = ti
+            while same_end < n_trades and t_dates[same_end] == eff:
+                same_end += 1
+            # The snapshot includes trades dated on the split day but not the
+            # split itself (nor same-day peers), matching the old per-split
+            # FIFO run with prior_actions strictly before eff.
+            qty_at_eff = _roll_trades(held, ti, same_end)
+
+            for _, action in grp.iterrows():
+                r_from = action.get("ratio_from")
+                r_to = action.get("ratio_to")
+                if r_from is None or r_to is None:
+                    _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio=unknown (skipped)")
+                    continue
+                try:
+                    r_from = float(r_from)
+                    r_to = float(r_to)
+                except Exception:
+                    _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio_invalid={r_from}:{r_to} (skipped)")
+                    continue
+                if r_from <= 0 or r_to <= 0:
+                    _user_log(f"[SplitCheck]   {symbol} split={eff.isoformat()} ratio_non_positive={r_from}:{r_to} (skipped)")
+                    continue
+
+                factor = r_to / r_from
+                qty_before = float(qty_at_eff)
+                qty_after = qty_before * factor
+                delta = qty_after - qty_before
+                _user_log(
+                    f"[SplitCheck]   split={eff.isoformat()} ratio={r_from:g}:{r_to:g} "
+                    f"affected_qty={qty_before:.4f} -> {qty_after:.4f} (delta={delta:+.4f})"
+                )
+                impact_rows.append({
+                    "symbol": symbol,
+                    "first_buy_date": first_buy_date.isoformat(),
+                    "split_date": eff.isoformat(),
+                    "ratio_from": r_from,
+                    "ratio_to": r_to,
+                    "qty_before": round(qty_before, 4),
+                    "qty_after": round(qty_after, 4),
+                    "delta_qty": round(delta, 4),
+                    "source": action.get("source"),
+                    "source_ref": action.get("source_ref"),
+                })
+                any_logged = True
+                # Valid splits scale the running position before same-day
+                # trades are folded in, mirroring lot application in core
+                # (which also ignores non-positive/NaN factors).
+                if factor > 0:
+                    held *= factor
+
+            held = _roll_trades(held, ti, same_end)
+            ti = same_end
 
     if not any_logged:
         _user_log("[SplitCheck] No splits found after first BUY date for preview symbols.")
@@ -347,26 +619,35 @@ async def ingest_preview(
             errors.append(
                 "Tradebook uploaded without contract notes. Charges cannot be computed correctly because tradebook does not contain detailed charge data."
             )
-        note_map = {}
+        daily_rows = []
         contract_trade_rows = []
         contract_charge_rows = []
 
-        def _clean_number(val, default_zero=False):
-            if val is None:
-                return 0.0 if default_zero else None
-            if isinstance(val, str) and val.strip().lower() == "nan":
-                return 0.0 if default_zero else None
-            if pd.isna(val):
-                return 0.0 if default_zero else None
-            try:
-                f_val = float(val)
-            except Exception:
-                return 0.0 if default_zero else None
-            if not math.isfinite(f_val):
-                return 0.0 if default_zero else None
-            return f_val
-
-        for cf in (contracts or []):
+        contract_files = list(contracts or [])
+        parsed_lists = None
+        if len(contract_files) > 1:
+            # Multi-file uploads parse across cores in one pool. Worker
+            # payloads must pickle, so this path reads files into bytes;
+            # per-sheet progress isn't observable across processes, so
+            # progress advances per file below.
+            def _parse_all(datas):
+                results = []
+                with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(datas))) as ex:
+                    futures = [ex.submit(_parse_contract_note_seq, d) for d in datas]
+                    for fut in futures:
+                        try:
+                            results.append(fut.result())
+                        except Exception as e:
+                            results.append(e)
+                return results
+
+            datas = []
+            for cf in contract_files:
+                cf.file.seek(0)
+                datas.append(cf.file.read())
+            parsed_lists = await asyncio.to_thread(_parse_all, datas)
+
+        for fi, cf in enumerate(contract_files):
             completed_before = processed_files
             try:
                 _progress_update(
@@ -377,8 +658,6 @@ async def ingest_preview(
                     processed_files=processed_files,
                     left_files=max(total_files - processed_files, 0),
                 )
-                content = await cf.read()
-
                 def _sheet_progress(done_sheets: int, total_sheets: int, sheet_name: str):
                     total = max(int(total_sheets or 1), 1)
                     done = max(min(int(done_sheets or 0), total), 0)
@@ -387,6 +666,7 @@ async def ingest_preview(
                     in_file_progress = completed_before + in_file_ratio
                     _progress_update(
                         progress_id,
+                        _coalesce=True,
                         stage="contracts",
                         message=f"Parsing {cf.filename} ({done}/{total} sheets)",
                         total_files=total_files,
@@ -394,89 +674,110 @@ async def ingest_preview(
                         left_files=max(total_files - in_file_progress, 0),
                     )
 
-                parsed_list = parse_contract_note(content, progress_cb=_sheet_progress)
+                if parsed_lists is not None:
+                    parsed_list = parsed_lists[fi]
+                    if isinstance(parsed_list, Exception):
+                        raise parsed_list
+                else:
+                    # Single file: hand the upload's spooled temp file straight
+                    # to the parser (no whole-file read into RAM) and run the
+                    # CPU-bound parse off the event loop. Heavy workbooks
+                    # already fan out internally.
+                    parsed_list = await asyncio.to_thread(
+                        parse_contract_note, cf.file, progress_cb=_sheet_progress
+                    )
                 if parsed_list:
+                    # Single pass per sheet: daily totals, trade rows, and
+                    # charge rows share the same charges unwrap.
                     for data in parsed_list:
+                        sheet_name = data.get("sheet_name")
                         for warn in data.get("warnings", []):
-                            errors.append(f"{cf.filename} [{data.get('sheet_name', 'Sheet')}]: {warn}")
+                            errors.append(f"{cf.filename} [{sheet_name or 'Sheet'}]: {warn}")
 
-                        note_date = data["trade_date"]
+                        trade_date = data["trade_date"]
                         charges = data.get("charges", {}) or {}
                         charges_debug = data.get("charges_debug", {}) or {}
 
+                        cgst = charges.get("cgst") or 0
+                        sgst = charges.get("sgst") or 0
+                        igst = charges.get("igst") or 0
+                        stt = charges.get("stt") or 0
+                        exchange_txn = charges.get("exchange_txn_charges") or 0
+                        clearing = charges.get("clearing_charges") or 0
+                        sebi = charges.get("sebi_txn_tax") or 0
+                        stamp = charges.get("stamp_duty") or 0
+
                         total_brokerage = abs(charges.get("taxable_value_of_supply") or 0)
-                        total_taxes = abs(sum([
-                            charges.get("cgst") or 0,
-                            charges.get("sgst") or 0,
-                            charges.get("igst") or 0,
-                            charges.get("stt") or 0,
-                        ]))
-                        total_other = abs(sum([
-                            charges.get("exchange_txn_charges") or 0,
-                            charges.get("clearing_charges") or 0,
-                            charges.get("sebi_txn_tax") or 0,
-                            charges.get("stamp_duty") or 0,
-                        ]))
+                        total_taxes = abs(cgst + sgst + igst + stt)
+                        total_other = abs(exchange_txn + clearing + sebi + stamp)
                         net_total = abs(charges.get("net_amount_receivable") or 0)
 
-                        daily = {
-                            "date": note_date,
+                        # Per-sheet rows; same-date sheets are summed in one
+                        # groupby after the contracts loop.
+                        daily_rows.append({
+                            "date": trade_date,
                             "total_brokerage": total_brokerage,
                             "total_taxes": total_taxes,
                             "total_other_charges": total_other,
                             "net_total_paid": net_total,
-                        }
-
-                        if note_date in note_map:
-                            note_map[note_date]["total_brokerage"] += daily["total_brokerage"] or 0
-                            note_map[note_date]["total_taxes"] += daily["total_taxes"] or 0
-                            note_map[note_date]["total_other_charges"] += daily["total_other_charges"] or 0
-                            note_map[note_date]["net_total_paid"] += daily["net_total_paid"] or 0
-                        else:
-                            note_map[note_date] = daily
+                        })
 
-                    for data in parsed_list:
-                        sheet_name = data.get("sheet_name")
-                        trade_date = data.get("trade_date")
                         contract_note_no = data.get("contract_note_no")
                         if not contract_note_no:
                             errors.append(f"{cf.filename} [{sheet_name or 'Sheet'}]: missing Contract Note No")
 
-                        for t in data.get("trades", []):
-                            contract_trade_rows.append({
-                                "contract_note_no": contract_note_no,
-                                "trade_date": trade_date.isoformat() if trade_date else None,
-                                "order_no": t.get("order_no"),
-                                "order_time": t.get("order_time"),
-                                "trade_no": t.get("trade_no"),
-                                "trade_time": t.get("trade_time"),
-                                "security_desc": t.get("security_desc"),
-                                "side": t.get("side"),
-                                "quantity": _clean_number(t.get("quantity")),
-                                "exchange": t.get("exchange"),
-                                "gross_rate": _clean_number(t.get("gross_rate")),
-                                "net_total": _clean_number(t.get("net_total")),
-                                "sheet_name": sheet_name,
-                                "file_name": cf.filename,
-                            })
-
-                        charges = data.get("charges", {}) or {}
+                        # Clean numeric fields column-wise instead of calling
+                        # _clean_number once per cell.
+                        trades_list = data.get("trades", [])
+                        if trades_list:
+                            df_t = pd.DataFrame(trades_list)
+                            for col in ("order_no", "order_time", "trade_no", "trade_time",
+                                        "security_desc", "side", "exchange",
+                                        "quantity", "gross_rate", "net_total"):
+                                if col not in df_t.columns:
+                                    df_t[col] = None
+                            for col in ("quantity", "gross_rate", "net_total"):
+                                cleaned = pd.to_numeric(df_t[col], errors="coerce").astype("float64")
+                                cleaned = cleaned.replace([np.inf, -np.inf], np.nan)
+                                df_t[col] = cleaned.astype(object).where(cleaned.notna(), None)
+                            df_t["contract_note_no"] = contract_note_no
+                            df_t["trade_date"] = trade_date.isoformat() if trade_date else None
+                            df_t["sheet_name"] = sheet_name
+                            df_t["file_name"] = cf.filename
+                            contract_trade_rows.extend(df_t[[
+                                "contract_note_no", "trade_date", "order_no", "order_time",
+                                "trade_no", "trade_time", "security_desc", "side",
+                                "quantity", "exchange", "gross_rate", "net_total",
+                                "sheet_name", "file_name",
+                            ]].to_dict("records"))
+
+                        charge_keys = (
+                            "pay_in_out_obligation", "taxable_value_of_supply",
+                            "exchange_txn_charges", "clearing_charges",
+                            "cgst", "sgst", "igst", "stt",
+                            "sebi_txn_tax", "stamp_duty", "net_amount_receivable",
+                        )
+                        cleaned = pd.to_numeric(
+                            pd.Series([charges.get(k) for k in charge_keys], index=charge_keys, dtype=object),
+                            errors="coerce",
+                        ).replace([np.inf, -np.inf], np.nan)
+                        cv = {k: (None if pd.isna(v) else float(v)) for k, v in cleaned.items()}
                         charge_row = {
                             "contract_note_no": contract_note_no,
                             "trade_date": trade_date.isoformat() if trade_date else None,
-                            "pay_in_out_obligation": _clean_number(charges.get("pay_in_out_obligation")),
-                            "taxable_value_of_supply": _clean_number(charges.get("taxable_value_of_supply")),
-                            "brokerage": _clean_number(charges.get("taxable_value_of_supply")),
-                            "exchange_txn_charges": _clean_number(charges.get("exchange_txn_charges")),
-                            "clearing_charges": _clean_number(charges.get("clearing_charges")),
-                            "cgst": _clean_number(charges.get("cgst")),
-                            "sgst": _clean_number(charges.get("sgst")),
-                            "igst": _clean_number(charges.get("igst")),
-                            "stt": _clean_number(charges.get("stt")),
-                            "sebi_txn_tax": _clean_number(charges.get("sebi_txn_tax")),
-                            "sebi_turnover_fees": _clean_number(charges.get("sebi_txn_tax")),
-                            "stamp_duty": _clean_number(charges.get("stamp_duty")),
-                            "net_amount_receivable": _clean_number(charges.get("net_amount_receivable")),
+                            "pay_in_out_obligation": cv["pay_in_out_obligation"],
+                            "taxable_value_of_supply": cv["taxable_value_of_supply"],
+                            "brokerage": cv["taxable_value_of_supply"],
+                            "exchange_txn_charges": cv["exchange_txn_charges"],
+                            "clearing_charges": cv["clearing_charges"],
+                            "cgst": cv["cgst"],
+                            "sgst": cv["sgst"],
+                            "igst": cv["igst"],
+                            "stt": cv["stt"],
+                            "sebi_txn_tax": cv["sebi_txn_tax"],
+                            "sebi_turnover_fees": cv["sebi_txn_tax"],
+                            "stamp_duty": cv["stamp_duty"],
+                            "net_amount_receivable": cv["net_amount_receivable"],
                             "sheet_name": sheet_name,
                             "file_name": cf.filename,
                             "debug": charges_debug,
@@ -533,9 +834,8 @@ async def ingest_preview(
                 processed_files=round(completed_before + 0.15, 3),
                 left_files=max(total_files - (completed_before + 0.15), 0),
             )
-            tb_content = await tb.read()
             try:
-                one_df = parse_tradebook(tb_content)
+                one_df = await asyncio.to_thread(parse_tradebook, tb.file)
                 _progress_update(
                     progress_id,
                     stage="tradebooks",
@@ -561,60 +861,80 @@ async def ingest_preview(
 
         trades_df = pd.concat(trades_df_list, ignore_index=True)
         before_dedupe = len(trades_df)
-        trades_df = trades_df.sort_values("trade_date").drop_duplicates(subset=["trade_id"], keep="last")
+        # Stable mergesort is O(n) on the already-sorted single-file case and
+        # keeps file order within equal dates; duplicated() skips the
+        # hash-reinsertion pass drop_duplicates does.
+        trades_df = trades_df.sort_values("trade_date", kind="mergesort")
+        trades_df = trades_df.loc[~trades_df["trade_id"].duplicated(keep="last")]
         dropped_rows = before_dedupe - len(trades_df)
         if dropped_rows > 0:
             errors.append(f"Skipped {dropped_rows} duplicate trade rows by trade_id from uploaded tradebook files.")
 
-        alias_map = _load_symbol_alias_map(db)
+        # DB round trips below run via to_thread: no async driver is wired
+        # up, so the sync Session would otherwise block the event loop and
+        # serialize concurrent previews. The session is only ever used from
+        # one thread at a time.
+        alias_map = await asyncio.to_thread(_load_symbol_alias_map, db)
         symbol_buy_start_dates = {}
         buy_df = trades_df[trades_df["trade_type"] == "BUY"]
         if not buy_df.empty:
-            for symbol, grp in buy_df.groupby("symbol"):
-                norm_symbol = _resolve_alias_symbol(symbol, alias_map)
-                min_date = grp["trade_date"].min()
-                if norm_symbol not in symbol_buy_start_dates or min_date < symbol_buy_start_dates[norm_symbol]:
-                    symbol_buy_start_dates[norm_symbol] = min_date
+            # One C-level min per symbol, alias resolution once per distinct
+            # symbol (chains need _resolve_alias_symbol, not a plain map),
+            # then a second min to merge symbols collapsing onto one alias.
+            mins = buy_df.groupby("symbol", observed=True)["trade_date"].min().reset_index()
+            mins["symbol"] = mins["symbol"].map(
+                {s: _resolve_alias_symbol(str(s), alias_map) for s in mins["symbol"]}
+            )
+            symbol_buy_start_dates = mins.groupby("symbol")["trade_date"].min().to_dict()
 
-        corp_sync = _sync_corporate_actions_for_symbols(
+        corp_sync = await asyncio.to_thread(
+            _sync_corporate_actions_for_symbols,
             db=db,
             symbols=list(symbol_buy_start_dates.keys()),
             start_dates_by_symbol=symbol_buy_start_dates,
         )
         preview_fifo_df = _to_fifo_trade_df(trades_df)
         preview_fifo_df = _apply_aliases_to_trades_df(preview_fifo_df, alias_map)
-        corporate_actions_df = _load_corporate_actions_df(db)
+        corporate_actions_df = await asyncio.to_thread(_load_corporate_actions_df, db)
         split_impact_rows = _log_split_impacts_for_preview(preview_fifo_df, corporate_actions_df)
         if corp_sync.get("warnings"):
             errors.extend(corp_sync["warnings"])
 
-        # 3) Prepare JSON payloads
-        trade_rows = []
-        for _, row in trades_df.iterrows():
-            trade_rows.append({
-                "trade_id": str(row["trade_id"]),
-                "symbol": row["symbol"],
-                "isin": row.get("isin", ""),
-                "date": row["trade_date"].isoformat(),
-                "type": row["trade_type"],
-                "quantity": float(row["quantity"]),
-                "price": float(row["price"]),
-                "gross_amount": float(row["gross_amount"]),
-            })
-
-        contract_rows = []
-        for note_date, data in note_map.items():
-            contract_rows.append({
-                "date": note_date.isoformat(),
-                "total_brokerage": _clean_number(data["total_brokerage"], default_zero=True),
-                "total_taxes": _clean_number(data["total_taxes"], default_zero=True),
-                "total_other_charges": _clean_number(data["total_other_charges"], default_zero=True),
-                "net_total_paid": _clean_number(data["net_total_paid"], default_zero=True),
-            })
-
-        trade_dates = {row["date"] for row in trade_rows}
-        note_dates = {row["date"] for row in contract_rows}
-        missing_dates = sorted([d for d in trade_dates if d not in note_dates])
+        # 3) Prepare JSON payloads (column-wise; iterrows boxes every row)
+        payload_df = trades_df.assign(
+            trade_id=trades_df['trade_id'].astype(str),
+            symbol=trades_df['symbol'].astype(str),
+            date=pd.to_datetime(trades_df['trade_date']).dt.strftime('%Y-%m-%d'),
+            quantity=trades_df['quantity'].astype(float),
+            price=trades_df['price'].astype(float),
+            gross_amount=trades_df['gross_amount'].astype(float),
+        ).rename(columns={'trade_type': 'type'})
+        if 'isin' not in payload_df.columns:
+            payload_df['isin'] = ''
+        trade_rows = payload_df[[
+            'trade_id', 'symbol', 'isin', 'date', 'type',
+            'quantity', 'price', 'gross_amount',
+        ]].to_dict('records')
+
+        charge_cols = ["total_brokerage", "total_taxes", "total_other_charges", "net_total_paid"]
+        if daily_rows:
+            daily_df = pd.DataFrame(daily_rows).groupby("date", as_index=False).sum()
+            # Same cleanup _clean_number(default_zero=True) applied per value:
+            # non-finite sums become 0.0.
+            sums = daily_df[charge_cols].astype(float)
+            daily_df[charge_cols] = sums.where(np.isfinite(sums), 0.0)
+        else:
+            daily_df = pd.DataFrame(columns=["date"] + charge_cols)
+        contract_rows = daily_df.assign(
+            date=daily_df["date"].astype(str)
+        ).to_dict("records")
+
+        # Set-difference on datetime64 arrays instead of per-row membership
+        # tests over the just-serialized ISO strings.
+        trade_dates = pd.to_datetime(trades_df['trade_date']).dt.normalize().unique()
+        note_dates = pd.DatetimeIndex(pd.to_datetime(daily_df["date"]))
+        missing = np.sort(np.setdiff1d(trade_dates, note_dates.to_numpy()))
+        missing_dates = [d.date().isoformat() for d in pd.to_datetime(missing)]
 
         summary = {
             "trades_count": len(trade_rows),
@@ -636,14 +956,13 @@ async def ingest_preview(
             is_committed=False,
             tradebook_filename=", ".join(tradebook_filenames),
             contract_filenames=[c.filename for c in (contracts or [])],
-            trade_rows=trade_rows,
-            contract_rows=contract_rows,
-            contract_trade_rows=contract_trade_rows,
-            contract_charge_rows=contract_charge_rows,
+            payload_blob=_pack_staging_payload(
+                trade_rows, contract_rows, contract_trade_rows, contract_charge_rows
+            ),
             summary=summary,
         )
         db.add(batch)
-        db.commit()
+        await asyncio.to_thread(db.commit)
 
         _progress_update(
             progress_id,
@@ -687,7 +1006,31 @@ def ingest_progress(progress_id: str):
     row = _INGEST_PROGRESS.get(progress_id)
     if not row:
         raise HTTPException(status_code=404, detail="Progress id not found")
-    return row
+    out = {k: v for k, v in row.items() if k != "_ts"}
+    out["updated_at"] = datetime.utcfromtimestamp(row.get("_ts", 0.0)).isoformat()
+    return out
+
+def _pack_staging_payload(trade_rows, contract_rows, contract_trade_rows, contract_charge_rows):
+    # One compressed blob instead of four JSONB columns: the DB stores and
+    # ships the staged rows once, and commit decodes them in a single pass.
+    payload = {
+        "trade_rows": trade_rows,
+        "contract_rows": contract_rows,
+        "contract_trade_rows": contract_trade_rows,
+        "contract_charge_rows": contract_charge_rows,
+    }
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+def _unpack_staging_payload(batch):
+    if batch.payload_blob:
+        return json.loads(zlib.decompress(batch.payload_blob))
+    # Batches staged before the blob column kept per-column JSONB.
+    return {
+        "trade_rows": batch.trade_rows or [],
+        "contract_rows": batch.contract_rows or [],
+        "contract_trade_rows": batch.contract_trade_rows or [],
+        "contract_charge_rows": batch.contract_charge_rows or [],
+    }
 
 @app.post("/ingest/commit")
 def ingest_commit(payload: dict, db: Session = Depends(get_db)):
@@ -702,10 +1045,15 @@ def ingest_commit(payload: dict, db: Session = Depends(get_db)):
         if batch.is_committed:
             raise HTTPException(status_code=400, detail="This staging batch is already committed.")
 
-        # Upsert Contract Notes (daily summaries)
-        for row in batch.contract_rows or []:
+        staged = _unpack_staging_payload(batch)
+
+        # Upsert Contract Notes (daily summaries); dates parsed in one pass
+        # instead of re-entering the datetime parser per row.
+        contract_note_rows = staged["contract_rows"]
+        note_dates = pd.to_datetime(pd.Series([row["date"] for row in contract_note_rows]))
+        for i, row in enumerate(contract_note_rows):
             note = ContractNote(
-                date=pd.to_datetime(row["date"]).date(),
+                date=note_dates[i].date(),
                 total_brokerage=row["total_brokerage"],
                 total_taxes=row["total_taxes"],
                 total_other_charges=row["total_other_charges"],
@@ -713,90 +1061,117 @@ def ingest_commit(payload: dict, db: Session = Depends(get_db)):
             )
             db.merge(note)
 
-        # Remove existing contract note rows for same file/date to prevent duplicates
-        trade_dates = set()
-        file_names = set()
-        for row in batch.contract_trade_rows or []:
-            if row.get("trade_date"):
-                trade_dates.add(pd.to_datetime(row["trade_date"]).date())
-            if row.get("file_name"):
-                file_names.add(row.get("file_name"))
+        # Remove existing contract note rows for same file/date to prevent
+        # duplicates. Tuple-IN targets only the (date, file) pairs actually in
+        # the batch; the old date-IN + file-IN filter matched their full
+        # cross-product and could clear unrelated date/file combinations.
+        raw_pairs = {
+            (row["trade_date"], row["file_name"])
+            for row in staged["contract_trade_rows"]
+            if row.get("trade_date") and row.get("file_name")
+        }
+        pairs = []
+        if raw_pairs:
+            pair_list = sorted(raw_pairs)
+            pair_dates = pd.to_datetime(pd.Series([d for d, _ in pair_list]))
+            pairs = [(pair_dates[i].date(), f) for i, (_, f) in enumerate(pair_list)]
 
-        if trade_dates and file_names:
+        if pairs:
             db.query(ContractNoteTrade).filter(
-                ContractNoteTrade.trade_date.in_(trade_dates),
-                ContractNoteTrade.file_name.in_(file_names)
+                tuple_(ContractNoteTrade.trade_date, ContractNoteTrade.file_name).in_(pairs)
             ).delete(synchronize_session=False)
             db.query(ContractNoteCharge).filter(
-                ContractNoteCharge.trade_date.in_(trade_dates),
-                ContractNoteCharge.file_name.in_(file_names)
+                tuple_(ContractNoteCharge.trade_date, ContractNoteCharge.file_name).in_(pairs)
             ).delete(synchronize_session=False)
 
-        # Insert Contract Note Trades
-        for row in batch.contract_trade_rows or []:
-            db.add(ContractNoteTrade(
-                contract_note_no=row.get("contract_note_no"),
-                trade_date=pd.to_datetime(row["trade_date"]).date() if row.get("trade_date") else None,
-                order_no=row.get("order_no"),
-                order_time=row.get("order_time"),
-                trade_no=row.get("trade_no"),
-                trade_time=row.get("trade_time"),
-                security_desc=row.get("security_desc"),
-                side=row.get("side"),
-                quantity=row.get("quantity"),
-                exchange=row.get("exchange"),
-                gross_rate=row.get("gross_rate"),
-                net_total=row.get("net_total"),
-                sheet_name=row.get("sheet_name"),
-                file_name=row.get("file_name"),
-            ))
-
-        # Insert Contract Note Charges
-        for row in batch.contract_charge_rows or []:
-            db.add(ContractNoteCharge(
-                contract_note_no=row.get("contract_note_no"),
-                trade_date=pd.to_datetime(row["trade_date"]).date() if row.get("trade_date") else None,
-                pay_in_out_obligation=row.get("pay_in_out_obligation"),
-                taxable_value_of_supply=row.get("brokerage") if row.get("brokerage") is not None else row.get("taxable_value_of_supply"),
-                exchange_txn_charges=row.get("exchange_txn_charges"),
-                clearing_charges=row.get("clearing_charges"),
-                cgst=row.get("cgst"),
-                sgst=row.get("sgst"),
-                igst=row.get("igst"),
-                stt=row.get("stt"),
-                sebi_txn_tax=row.get("sebi_turnover_fees") if row.get("sebi_turnover_fees") is not None else row.get("sebi_txn_tax"),
-                stamp_duty=row.get("stamp_duty"),
-                net_amount_receivable=row.get("net_amount_receivable"),
-                sheet_name=row.get("sheet_name"),
-                file_name=row.get("file_name"),
-            ))
-
-        # Upsert Trades
-        for row in batch.trade_rows or []:
-            existing = db.query(Trade).filter(Trade.trade_id == row["trade_id"]).first()
-            if existing:
-                existing.symbol = row["symbol"]
-                existing.isin = row.get("isin", "")
-                existing.date = pd.to_datetime(row["date"]).date()
-                existing.type = row["type"]
-                existing.quantity = row["quantity"]
-                existing.price = row["price"]
-                existing.gross_amount = row["gross_amount"]
+        # Insert Contract Note Trades / Charges as batched multi-row statements;
+        # per-row db.add() paid one INSERT round-trip per row.
+        def _parse_row_dates(rows):
+            parsed = pd.to_datetime(pd.Series([r.get("trade_date") for r in rows]), errors="coerce")
+            return [d.date() if pd.notna(d) else None for d in parsed]
+
+        cnt_rows = staged["contract_trade_rows"]
+        cnt_dates = _parse_row_dates(cnt_rows)
+        bulk_insert(db, ContractNoteTrade, [
+            {
+                "contract_note_no": row.get("contract_note_no"),
+                "trade_date": cnt_dates[i],
+                "order_no": row.get("order_no"),
+                "order_time": row.get("order_time"),
+                "trade_no": row.get("trade_no"),
+                "trade_time": row.get("trade_time"),
+                "security_desc": row.get("security_desc"),
+                "side": row.get("side"),
+                "quantity": row.get("quantity"),
+                "exchange": row.get("exchange"),
+                "gross_rate": row.get("gross_rate"),
+                "net_total": row.get("net_total"),
+                "sheet_name": row.get("sheet_name"),
+                "file_name": row.get("file_name"),
+            }
+            for i, row in enumerate(cnt_rows)
+        ])
+
+        charge_rows = staged["contract_charge_rows"]
+        charge_dates = _parse_row_dates(charge_rows)
+        bulk_insert(db, ContractNoteCharge, [
+            {
+                "contract_note_no": row.get("contract_note_no"),
+                "trade_date": charge_dates[i],
+                "pay_in_out_obligation": row.get("pay_in_out_obligation"),
+                "taxable_value_of_supply": row.get("brokerage") if row.get("brokerage") is not None else row.get("taxable_value_of_supply"),
+                "exchange_txn_charges": row.get("exchange_txn_charges"),
+                "clearing_charges": row.get("clearing_charges"),
+                "cgst": row.get("cgst"),
+                "sgst": row.get("sgst"),
+                "igst": row.get("igst"),
+                "stt": row.get("stt"),
+                "sebi_txn_tax": row.get("sebi_turnover_fees") if row.get("sebi_turnover_fees") is not None else row.get("sebi_txn_tax"),
+                "stamp_duty": row.get("stamp_duty"),
+                "net_amount_receivable": row.get("net_amount_receivable"),
+                "sheet_name": row.get("sheet_name"),
+                "file_name": row.get("file_name"),
+            }
+            for i, row in enumerate(charge_rows)
+        ])
+
+        # Upsert Trades: one SELECT for the existing ids, then decide
+        # insert-vs-update in memory instead of one query per row.
+        upsert_rows = staged["trade_rows"]
+        trade_ids = [row["trade_id"] for row in upsert_rows]
+        existing_pk = {}
+        if trade_ids:
+            existing_pk = {
+                r[0]: r[1]
+                for r in db.query(Trade.trade_id, Trade.id).filter(Trade.trade_id.in_(trade_ids))
+            }
+        parsed_trade_dates = pd.to_datetime(pd.Series([row["date"] for row in upsert_rows]))
+        to_insert, to_update = [], []
+        for i, row in enumerate(upsert_rows):
+            mapping = {
+                "trade_id": row["trade_id"],
+                "symbol": row["symbol"],
+                "isin": row.get("isin", ""),
+                "date": parsed_trade_dates[i].date(),
+                "type": row["type"],
+                "quantity": row["quantity"],
+                "price": row["price"],
+                "gross_amount": row["gross_amount"],
+            }
+            if row["trade_id"] in existing_pk:
+                mapping["id"] = existing_pk[row["trade_id"]]
+                to_update.append(mapping)
             else:
-                db.add(Trade(
-                    trade_id=row["trade_id"],
-                    symbol=row["symbol"],
-                    isin=row.get("isin", ""),
-                    date=pd.to_datetime(row["date"]).date(),
-                    type=row["type"],
-                    quantity=row["quantity"],
-                    price=row["price"],
-                    gross_amount=row["gross_amount"],
-                ))
+                to_insert.append(mapping)
+        if to_update:
+            db.bulk_update_mappings(Trade, to_update)
+        bulk_insert(db, Trade, to_insert)
 
         batch.is_committed = True
         batch.committed_at = datetime.utcnow()
         db.commit()
+        _bump_trades_version()
+        _rebuild_realized_table(db)
 
         return {"message": "Ingestion committed successfully."}
     except HTTPException as he:
@@ -806,29 +1181,45 @@ def ingest_commit(payload: dict, db: Session = Depends(get_db)):
         _user_log(f"Commit Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# fy_label in SQL: FY year is date's year, plus one from April onwards.
+_FY_YEAR_SQL = case(
+    (func.extract("month", Trade.date) >= 4, func.extract("year", Trade.date) + 1),
+    else_=func.extract("year", Trade.date),
+)
+
 @app.get("/fy-list")
 def get_fy_list(db: Session = Depends(get_db)):
-    trades_df = pd.read_sql(db.query(Trade).statement, db.bind)
-    if trades_df.empty:
-        return {"fy_list": []}
-    fy_set = {fy_label(d) for d in trades_df['date']}
-    return {"fy_list": sorted(fy_set)}
+    # DISTINCT FY computed by the database: O(unique FYs) comes back over
+    # the wire instead of materializing every trade date into a frame.
+    years = db.execute(select(_FY_YEAR_SQL.distinct())).scalars().all()
+    return {"fy_list": [f"FY{y}" for y in sorted(int(y) for y in years)]}
 
 def _fy_end_date(fy: str):
     if not fy.startswith("FY"):
         raise ValueError("FY must be like FY2025")
-    year = int(fy.replace("FY", ""))
+    year = int(fy[2:])
     return date(year, 3, 31)
 
 def _fy_start_date(fy: str):
     if not fy.startswith("FY"):
         raise ValueError("FY must be like FY2025")
-    year = int(fy.replace("FY", ""))
+    year = int(fy[2:])
     return date(year - 1, 4, 1)
 
 def _load_symbol_alias_map(db: Session):
+    # Aliases change rarely; serve from the module cache (same TTL idea as
+    # _PRICE_CACHE) and refresh at most once per TTL window.
+    now = time.time()
+    if now - _ALIAS_CACHE["ts"] < _ALIAS_CACHE_TTL_SEC:
+        return _ALIAS_CACHE["map"]
     rows = db.query(SymbolAlias).filter(SymbolAlias.active == True).all()
-    return {r.from_symbol: r.to_symbol for r in rows}
+    raw_map = {r.from_symbol: r.to_symbol for r in rows}
+    # Flatten chains (OLD -> NEW -> FINAL) once per refresh so every later
+    # _resolve_alias_symbol walk terminates in a single hop.
+    alias_map = {k: _resolve_alias_symbol(k, raw_map) for k in raw_map}
+    _ALIAS_CACHE["ts"] = now
+    _ALIAS_CACHE["map"] = alias_map
+    return alias_map
 
 def _resolve_alias_symbol(symbol: str, alias_map: dict[str, str]):
     curr = (symbol or "").strip().upper()
@@ -845,24 +1236,172 @@ def _apply_aliases_to_trades_df(trades_df: pd.DataFrame, alias_map: dict[str, st
     if trades_df.empty or "symbol" not in trades_df.columns:
         return trades_df
     df = trades_df.copy()
-    df["symbol"] = df["symbol"].astype(str).map(lambda s: _resolve_alias_symbol(s, alias_map))
+    # Resolve each distinct symbol once; mapping categories merges aliases
+    # that collapse onto the same target.
+    sym = df["symbol"].astype("category")
+    resolved = {c: _resolve_alias_symbol(str(c), alias_map) for c in sym.cat.categories}
+    df["symbol"] = sym.map(resolved).astype("category")
     return df
 
+# Holdings memo: the same committed trade set is FIFO-matched several times
+# per request (/dashboard computes three cutoffs). Keyed on a version counter
+# bumped whenever committed trades or aliases change.
+_FIFO_CACHE = OrderedDict()
+_FIFO_CACHE_MAX = 64
+_TRADES_VERSION = 0
+
+def _bump_trades_version():
+    global _TRADES_VERSION
+    _TRADES_VERSION += 1
+    _FIFO_CACHE.clear()
+    _DF_CACHE.clear()
+
+# _TRADES_VERSION value realized_lots was last rebuilt for. Tracked
+# explicitly because the table's contents can't tell an empty-but-correct
+# rebuild (portfolio with no SELLs) from a missing backfill.
+_REALIZED_BUILT_VERSION = None
+
+def _rebuild_realized_table(db: Session):
+    """Recompute realized lots once and persist them to realized_lots.
+
+    /reports/realized and the dashboard FY total read that table instead of
+    re-running FIFO over every trade per request. Called wherever FIFO inputs
+    change: ingest commit, alias upsert and corporate-action sync.
+    """
+    global _REALIZED_BUILT_VERSION
+    trades_df = _load_trades_df(db)
+    notes_df = _load_notes_df(db)
+    corporate_actions_df = _load_corporate_actions_df(db)
+    alias_map = _load_symbol_alias_map(db)
+    trades_df = _apply_aliases_to_trades_df(trades_df, alias_map)
+
+    db.query(RealizedLot).delete()
+    if not trades_df.empty:
+        realized = calculate_realized_gains(
+            trades_df, notes_df, corporate_actions_df=corporate_actions_df
+        )
+        rows = [
+            {
+                "symbol": str(r["symbol"]),
+                "sell_date": r["sell_date"],
+                "fy": fy_label(r["sell_date"]),
+                "sell_qty": float(r["sell_qty"]),
+                "sell_price": float(r["sell_price"]),
+                "avg_buy_price": float(r["avg_buy_price"]),
+                "realized_pnl": float(r["realized_pnl"]),
+            }
+            for r in realized
+        ]
+        bulk_insert(db, RealizedLot, rows)
+    db.commit()
+    _REALIZED_BUILT_VERSION = _TRADES_VERSION
+
+def _ensure_realized_table(db: Session):
+    """Lazily build realized_lots for databases populated before it existed."""
+    global _REALIZED_BUILT_VERSION
+    if _REALIZED_BUILT_VERSION == _TRADES_VERSION:
+        return
+    if db.query(RealizedLot.id).first() is None and db.query(Trade.id).first() is not None:
+        _rebuild_realized_table(db)
+    else:
+        # Rows already present (or no trades at all): the table is current
+        # for this version; remember that so reads stop probing.
+        _REALIZED_BUILT_VERSION = _TRADES_VERSION
+
+def _fifo_holdings_cached(trades_df, notes_df, up_to_date=None, corporate_actions_df=None):
+    ca_count = 0 if corporate_actions_df is None else len(corporate_actions_df)
+    key = (_TRADES_VERSION, up_to_date, ca_count)
+    cached = _FIFO_CACHE.get(key)
+    if cached is not None:
+        _FIFO_CACHE.move_to_end(key)
+        return copy.deepcopy(cached)
+    holdings = calculate_fifo_holdings(
+        trades_df, notes_df, up_to_date=up_to_date, corporate_actions_df=corporate_actions_df
+    )
+    _FIFO_CACHE[key] = copy.deepcopy(holdings)
+    while len(_FIFO_CACHE) > _FIFO_CACHE_MAX:
+        _FIFO_CACHE.popitem(last=False)
+    return holdings
+
+def _fifo_snapshots_cached(trades_df, notes_df, snapshot_dates, corporate_actions_df=None):
+    """Holdings at several cutoffs, one FIFO sweep for all uncached dates.
+
+    Shares the per-date _FIFO_CACHE entries with _fifo_holdings_cached, so a
+    date computed here is a hit there and vice versa.
+    """
+    ca_count = 0 if corporate_actions_df is None else len(corporate_actions_df)
+    out = {}
+    missing = []
+    for d in snapshot_dates:
+        cached = _FIFO_CACHE.get((_TRADES_VERSION, d, ca_count))
+        if cached is not None:
+            _FIFO_CACHE.move_to_end((_TRADES_VERSION, d, ca_count))
+            out[d] = copy.deepcopy(cached)
+        else:
+            missing.append(d)
+    if missing:
+        computed = calculate_fifo_holdings_snapshots(
+            trades_df, notes_df, missing, corporate_actions_df=corporate_actions_df
+        )
+        for d, holdings in computed.items():
+            _FIFO_CACHE[(_TRADES_VERSION, d, ca_count)] = copy.deepcopy(holdings)
+            out[d] = holdings
+        while len(_FIFO_CACHE) > _FIFO_CACHE_MAX:
+            _FIFO_CACHE.popitem(last=False)
+    return out
+
+def _price_cache_fresh(ticker: str, now: float):
+    entry = _PRICE_CACHE.get(ticker)
+    if entry and (now - entry["ts"] <= _PRICE_CACHE_TTL_SEC):
+        return entry
+    return None
+
 def _resolve_latest_prices(symbols: list[str], alias_map: dict[str, str]):
     if not symbols:
         return {}, []
     mapped = {s: _resolve_alias_symbol(s, alias_map) for s in symbols}
-    tickers = [mapped[s] + ".NS" for s in symbols]
+    tickers = {s: mapped[s] + ".NS" for s in symbols}
+
+    now = time.time()
+    stale = [s for s in symbols if _price_cache_fresh(tickers[s], now) is None]
+    if stale:
+        needed = {tickers[s] for s in stale}
+        # Claim the stale tickers nobody else is downloading, fetch just
+        # those, then wait out any overlap another request has in flight.
+        with _PRICE_FETCH_COND:
+            now = time.time()
+            claim = sorted(
+                t for t in needed
+                if t not in _PRICE_INFLIGHT and _price_cache_fresh(t, now) is None
+            )
+            _PRICE_INFLIGHT.update(claim)
+        if claim:
+            try:
+                _fetch_latest_prices(claim, time.time())
+            finally:
+                with _PRICE_FETCH_COND:
+                    _PRICE_INFLIGHT.difference_update(claim)
+                    _PRICE_FETCH_COND.notify_all()
+        with _PRICE_FETCH_COND:
+            while needed & _PRICE_INFLIGHT:
+                _PRICE_FETCH_COND.wait()
+
     live_prices = {}
     missing_symbols = []
+    for s in symbols:
+        entry = _PRICE_CACHE.get(tickers[s])
+        price = entry.get("price") if entry else None
+        if price is not None:
+            live_prices[s] = price
+        else:
+            missing_symbols.append({"symbol": s, "attempted": mapped[s]})
+    return live_prices, missing_symbols
 
-    # Cache key includes symbol->ticker mapping to keep results consistent.
-    cache_key = tuple(sorted(f"{s}:{mapped[s]}" for s in symbols))
-    now = time.time()
-    cached = _PRICE_CACHE.get(cache_key)
-    if cached and (now - cached["ts"] <= _PRICE_CACHE_TTL_SEC):
-        return cached["live_prices"], cached["missing_symbols"]
+# Yahoo's quote URL caps out around 20 symbols; larger requests get
+# silently truncated, so stale tickers are fetched in chunks of 20.
+_PRICE_FETCH_CHUNK = 20
 
+def _fetch_latest_prices(tickers: list[str], now: float):
     def _last_valid(series: pd.Series):
         if series is None:
             return None
@@ -871,31 +1410,36 @@ def _resolve_latest_prices(symbols: list[str], alias_map: dict[str, str]):
             return None
         return series.iloc[-1]
 
-    data = yf.download(tickers, period="5d", progress=False)['Close']
-    if len(symbols) == 1:
-        series = data if isinstance(data, pd.Series) else data.iloc[:, 0]
-        val = _last_valid(series)
-        if val is not None and pd.notnull(val):
-            live_prices[symbols[0]] = val
-        else:
-            missing_symbols.append({"symbol": symbols[0], "attempted": mapped[symbols[0]]})
-    else:
-        for s in symbols:
-            col = mapped[s] + ".NS"
-            series = data[col] if col in data else None
-            val = _last_valid(series) if series is not None else None
-            if val is not None and pd.notnull(val):
-                live_prices[s] = val
+    for i in range(0, len(tickers), _PRICE_FETCH_CHUNK):
+        chunk = tickers[i:i + _PRICE_FETCH_CHUNK]
+        data = yf.download(
+            chunk, period="5d", progress=False, threads=True, session=_YF_SESSION
+        )['Close']
+        for ticker in chunk:
+            if len(chunk) == 1:
+                series = data if isinstance(data, pd.Series) else data.iloc[:, 0]
             else:
-                missing_symbols.append({"symbol": s, "attempted": mapped[s]})
-
-    # Store in-memory cache to reuse across dashboard + summary requests.
-    _PRICE_CACHE[cache_key] = {
-        "ts": now,
-        "live_prices": live_prices,
-        "missing_symbols": missing_symbols,
-    }
-    return live_prices, missing_symbols
+                series = data[ticker] if ticker in data else None
+            val = _last_valid(series) if series is not None else None
+            price = float(val) if val is not None and pd.notnull(val) else None
+            _PRICE_CACHE[ticker] = {"ts": now, "price": price}
+
+    # Bound the cache: expired entries first, then oldest-ts if a huge
+    # symbol universe still pushes it over the cap. Fetches for disjoint
+    # ticker sets run concurrently now, so the sweep and the disk mirror
+    # take the cache lock to avoid iterating a dict another fetch mutates.
+    with _PRICE_FETCH_LOCK:
+        expired = [t for t, e in _PRICE_CACHE.items() if now - e.get("ts", 0) > _PRICE_CACHE_TTL_SEC]
+        for t in expired:
+            _PRICE_CACHE.pop(t, None)
+        if len(_PRICE_CACHE) > _PRICE_CACHE_MAX:
+            for t in sorted(_PRICE_CACHE, key=lambda t: _PRICE_CACHE[t].get("ts", 0))[
+                : len(_PRICE_CACHE) - _PRICE_CACHE_MAX
+            ]:
+                _PRICE_CACHE.pop(t, None)
+
+        # Mirror to disk so restarts stay warm.
+        _save_price_cache_file()
 
 @app.post("/symbols/aliases")
 def upsert_symbol_aliases(payload: dict, db: Session = Depends(get_db)):
@@ -914,6 +1458,11 @@ def upsert_symbol_aliases(payload: dict, db: Session = Depends(get_db)):
         else:
             db.add(SymbolAlias(from_symbol=from_symbol, to_symbol=to_symbol, active=True))
     db.commit()
+    # Drop the cached map (and dependent holdings) so the next dashboard hit
+    # sees the new aliases.
+    _ALIAS_CACHE["ts"] = 0.0
+    _bump_trades_version()
+    _rebuild_realized_table(db)
     return {"message": "Aliases updated."}
 
 @app.get("/symbols/aliases")
@@ -921,12 +1470,11 @@ def list_symbol_aliases(db: Session = Depends(get_db)):
     rows = db.query(SymbolAlias).filter(SymbolAlias.active == True).all()
     return {"aliases": [{"from_symbol": r.from_symbol, "to_symbol": r.to_symbol} for r in rows]}
 
-@app.get("/dashboard")
-def get_dashboard(fy: str, db: Session = Depends(get_db)):
+def _get_dashboard_sync(fy: str, db: Session):
     try:
         # 1. Load Data
-        trades_df = pd.read_sql(db.query(Trade).statement, db.bind)
-        notes_df = pd.read_sql(db.query(ContractNote).statement, db.bind)
+        trades_df = _load_trades_df(db)
+        notes_df = _load_notes_df(db)
         corporate_actions_df = _load_corporate_actions_df(db)
         alias_map = _load_symbol_alias_map(db)
         trades_df = _apply_aliases_to_trades_df(trades_df, alias_map)
@@ -948,11 +1496,21 @@ def get_dashboard(fy: str, db: Session = Depends(get_db)):
         unique_note_dates = set(notes_df['date'])
         missing_dates = sorted([str(d) for d in unique_trade_dates if d not in unique_note_dates])
 
-        # 3. Logic
-        holdings_dict = calculate_fifo_holdings(trades_df, notes_df, corporate_actions_df=corporate_actions_df)
+        # 3. Logic — one sweep (or pure memo hits) yields the current book
+        # and both FY cutoffs; a snapshot at today equals current holdings,
+        # trailing splits included.
+        fy_end = _fy_end_date(fy)
+        prev_fy_end = date(fy_end.year - 1, 3, 31)
+        today = date.today()
+        snaps = _fifo_snapshots_cached(
+            trades_df, notes_df, [prev_fy_end, fy_end, today],
+            corporate_actions_df=corporate_actions_df,
+        )
+        holdings_dict = snaps[today]
 
         # 4. Live Data
-        active_symbols = [s for s, batches in holdings_dict.items() if sum(b['qty'] for b in batches) > 0.01]
+        totals = holdings_totals(holdings_dict)
+        active_symbols = [s for s, (qty, _) in totals.items() if qty > 0.01]
         live_prices = {}
         missing_symbols = []
         
@@ -963,32 +1521,40 @@ def get_dashboard(fy: str, db: Session = Depends(get_db)):
                 _user_log(f"YFinance Error: {e}")
                 missing_symbols = [{"symbol": s, "attempted": alias_map.get(s, s)} for s in active_symbols]
 
-        # 5. Build Holdings Response
-        result = []
-        for sym, batches in holdings_dict.items():
-            qty = sum(b['qty'] for b in batches)
-            if qty > 0.01:
-                avg_price = abs(sum(b['qty'] * b['price'] for b in batches) / qty)
-                cmp = live_prices.get(sym, avg_price)
-                
-                result.append({
-                    "symbol": sym,
-                    "quantity": round(qty, 2),
-                    "avg_price": round(avg_price, 2),
-                    "cmp": round(cmp, 2),
-                    "current_val": round(qty * cmp, 2),
-                    "invested_val": round(qty * avg_price, 2),
-                    "pnl": round((qty * cmp) - (qty * avg_price), 2),
-                    "pnl_pct": round(((cmp - avg_price) / avg_price) * 100, 2) if avg_price > 0 else 0
-                })
-
-        # 6. FY Summary (Realized P&L)
-        realized = calculate_realized_gains(trades_df, notes_df, corporate_actions_df=corporate_actions_df)
+        # 5. Build Holdings Response — columnwise over the per-symbol totals
+        # instead of a python dict per symbol with eight round() calls each.
+        hold_df = pd.DataFrame(
+            [(s, q, inv) for s, (q, inv) in totals.items()],
+            columns=["symbol", "qty", "invested"],
+        )
+        hold_df = hold_df[hold_df["qty"] > 0.01]
+        avg_price = (hold_df["invested"] / hold_df["qty"]).abs()
+        cmp_price = hold_df["symbol"].map(live_prices).fillna(avg_price)
+        current_val = hold_df["qty"] * cmp_price
+        invested_val = hold_df["qty"] * avg_price
+        pnl_pct = np.where(
+            avg_price > 0, (cmp_price - avg_price) / avg_price * 100, 0.0
+        )
+        result = pd.DataFrame({
+            "symbol": hold_df["symbol"].to_numpy(),
+            "quantity": hold_df["qty"].round(2),
+            "avg_price": avg_price.round(2),
+            "cmp": cmp_price.round(2),
+            "current_val": current_val.round(2),
+            "invested_val": invested_val.round(2),
+            "pnl": (current_val - invested_val).round(2),
+            "pnl_pct": np.round(pnl_pct, 2),
+        }).to_dict("records")
+
+        # 6. FY Summary (Realized P&L) — indexed sum over the persisted
+        # realized_lots table instead of a FIFO re-run per request.
+        _ensure_realized_table(db)
+        realized_total = float(
+            db.query(func.coalesce(func.sum(RealizedLot.realized_pnl), 0.0))
+            .filter(RealizedLot.fy == fy)
+            .scalar()
+        )
         unmatched_sells = detect_unmatched_sells(trades_df)
-        realized_total = 0.0
-        for row in realized:
-            if fy_label(row["sell_date"]) == fy:
-                realized_total += row["realized_pnl"]
 
         fy_unmatched = [
             {
@@ -1004,21 +1570,16 @@ def get_dashboard(fy: str, db: Session = Depends(get_db)):
         # 7. Net Worth (estimated with latest prices)
         net_worth = sum(h["current_val"] for h in result)
 
-        fy_end = _fy_end_date(fy)
-        prev_fy_end = date(fy_end.year - 1, 3, 31)
-
-        holdings_fy = calculate_fifo_holdings(trades_df, notes_df, up_to_date=fy_end, corporate_actions_df=corporate_actions_df)
-        holdings_prev = calculate_fifo_holdings(trades_df, notes_df, up_to_date=prev_fy_end, corporate_actions_df=corporate_actions_df)
+        holdings_fy = snaps[fy_end]
+        holdings_prev = snaps[prev_fy_end]
 
         def _value(holdings_map):
             total = 0.0
-            for sym, batches in holdings_map.items():
-                qty = sum(b['qty'] for b in batches)
+            for sym, (qty, invested) in holdings_totals(holdings_map).items():
                 if qty > 0.01:
                     cmp = live_prices.get(sym)
                     if cmp is None:
-                        avg_price = sum(b['qty'] * b['price'] for b in batches) / qty
-                        cmp = avg_price
+                        cmp = invested / qty
                     total += qty * cmp
             return total
 
@@ -1026,11 +1587,11 @@ def get_dashboard(fy: str, db: Session = Depends(get_db)):
         net_worth_prev = _value(holdings_prev)
         net_worth_yoy = net_worth_fy - net_worth_prev
 
-        fy_set = {fy_label(d) for d in trades_df['date']}
+        fy_list = [f"FY{y}" for y in np.unique(trades_df['fy_year'])]
 
         return {
             "fy": fy,
-            "fy_list": sorted(fy_set),
+            "fy_list": fy_list,
             "holdings": result,
             "health_issues": missing_dates,
             "data_warnings": {
@@ -1046,12 +1607,43 @@ def get_dashboard(fy: str, db: Session = Depends(get_db)):
         _user_log(f"Portfolio Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/reports/summary")
-def get_report_summary(db: Session = Depends(get_db)):
+# Full-response memo for the dashboard. A response is deterministic for a
+# given (fy, trades version) within one df-cache TTL window — the window
+# also bounds how far served prices may lag a price-cache refresh — so the
+# memo and the ETag share that key. Browser polls with If-None-Match get a
+# bodyless 304; cache-busting clients still skip recompute via the memo.
+_DASH_CACHE = OrderedDict()
+_DASH_CACHE_MAX = 32
+
+def _dashboard_cache_key(fy: str):
+    return (fy, _TRADES_VERSION, int(time.time() // _DF_CACHE_TTL_SEC))
+
+@app.get("/dashboard")
+async def get_dashboard(fy: str, request: Request, db: Session = Depends(get_db)):
+    key = _dashboard_cache_key(fy)
+    etag = 'W/"' + "-".join(str(p) for p in key) + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    payload = _DASH_CACHE.get(key)
+    if payload is None:
+        # SQL reads, FIFO passes and yfinance calls all block; run them in a
+        # worker thread so the event loop keeps serving other requests.
+        # _PRICE_FETCH_LOCK is a threading lock precisely because this work
+        # runs in threads — it keeps cold downloads single-flight across them.
+        payload = await asyncio.to_thread(_get_dashboard_sync, fy, db)
+        _DASH_CACHE[key] = payload
+        while len(_DASH_CACHE) > _DASH_CACHE_MAX:
+            _DASH_CACHE.popitem(last=False)
+    else:
+        _DASH_CACHE.move_to_end(key)
+    return ORJSONResponse(payload, headers={"ETag": etag})
+
+def _get_report_summary_sync(db: Session):
     try:
-        trades_df = pd.read_sql(db.query(Trade).statement, db.bind)
-        charges_df = pd.read_sql(db.query(ContractNoteCharge).statement, db.bind)
-        notes_df = pd.read_sql(db.query(ContractNote).statement, db.bind)
+        trades_df = _load_trades_df(db)
+        charges_df = pd.read_sql_query(_CHARGES_SELECT, db.bind)
+        notes_df = _load_notes_df(db)
         corporate_actions_df = _load_corporate_actions_df(db)
         alias_map = _load_symbol_alias_map(db)
         trades_df = _apply_aliases_to_trades_df(trades_df, alias_map)
@@ -1059,11 +1651,13 @@ def get_report_summary(db: Session = Depends(get_db)):
         if trades_df.empty:
             return {"networth_by_fy": [], "charges_by_fy": []}
 
-        fy_set = sorted({fy_label(d) for d in trades_df['date']})
+        fy_set = [f"FY{y}" for y in np.unique(trades_df['fy_year'])]
 
         # Live prices for current holdings symbols
-        holdings_dict = calculate_fifo_holdings(trades_df, notes_df, corporate_actions_df=corporate_actions_df)
-        active_symbols = [s for s, batches in holdings_dict.items() if sum(b['qty'] for b in batches) > 0.01]
+        holdings_dict = _fifo_holdings_cached(trades_df, notes_df, corporate_actions_df=corporate_actions_df)
+        active_symbols = [
+            s for s, (qty, _) in holdings_totals(holdings_dict).items() if qty > 0.01
+        ]
         live_prices = {}
         if active_symbols:
             try:
@@ -1071,43 +1665,39 @@ def get_report_summary(db: Session = Depends(get_db)):
             except Exception as e:
                 _user_log(f"YFinance Error: {e}")
 
+        # One chronological sweep snapshots holdings at every FY boundary
+        # instead of re-running FIFO per FY; repeat hits come from the memo.
+        fy_ends = {fy: _fy_end_date(fy) for fy in fy_set}
+        snapshots = _fifo_snapshots_cached(
+            trades_df, notes_df, list(fy_ends.values()), corporate_actions_df=corporate_actions_df
+        )
         networth_by_fy = []
         for fy in fy_set:
-            fy_end = _fy_end_date(fy)
-            holdings_fy = calculate_fifo_holdings(trades_df, notes_df, up_to_date=fy_end, corporate_actions_df=corporate_actions_df)
             total = 0.0
-            for sym, batches in holdings_fy.items():
-                qty = sum(b['qty'] for b in batches)
+            for sym, (qty, invested) in holdings_totals(snapshots[fy_ends[fy]]).items():
                 if qty > 0.01:
                     cmp = live_prices.get(sym)
                     if cmp is None:
-                        avg_price = sum(b['qty'] * b['price'] for b in batches) / qty
-                        cmp = avg_price
+                        cmp = invested / qty
                     total += qty * cmp
             networth_by_fy.append({"fy": fy, "networth": round(total, 2)})
 
-        charges_by_fy = []
+        # One groupby over an fy column replaces per-FY mask + 8 column sums.
         if not charges_df.empty:
-            charges_df['trade_date'] = pd.to_datetime(charges_df['trade_date']).dt.date
-            for fy in fy_set:
-                fy_start = _fy_start_date(fy)
-                fy_end = _fy_end_date(fy)
-                mask = (charges_df['trade_date'] >= fy_start) & (charges_df['trade_date'] <= fy_end)
-                subset = charges_df[mask]
-                if subset.empty:
-                    charges_by_fy.append({"fy": fy, "charges": 0.0})
-                else:
-                    charges_total = (
-                        subset['exchange_txn_charges'].fillna(0).sum() +
-                        subset['clearing_charges'].fillna(0).sum() +
-                        subset['cgst'].fillna(0).sum() +
-                        subset['sgst'].fillna(0).sum() +
-                        subset['igst'].fillna(0).sum() +
-                        subset['stt'].fillna(0).sum() +
-                        subset['sebi_txn_tax'].fillna(0).sum() +
-                        subset['stamp_duty'].fillna(0).sum()
-                    )
-                    charges_by_fy.append({"fy": fy, "charges": round(float(charges_total), 2)})
+            charge_cols = [
+                'exchange_txn_charges', 'clearing_charges', 'cgst', 'sgst',
+                'igst', 'stt', 'sebi_txn_tax', 'stamp_duty',
+            ]
+            charges_df['fy'] = [f"FY{y}" for y in fy_label_vec(charges_df['trade_date'])]
+            totals = (
+                charges_df.groupby('fy')[charge_cols]
+                .sum()
+                .sum(axis=1)
+                .reindex(fy_set, fill_value=0.0)
+            )
+            charges_by_fy = [
+                {"fy": fy, "charges": round(float(totals[fy]), 2)} for fy in fy_set
+            ]
         else:
             charges_by_fy = [{"fy": fy, "charges": 0.0} for fy in fy_set]
 
@@ -1116,29 +1706,32 @@ def get_report_summary(db: Session = Depends(get_db)):
         _user_log(f"Report Summary Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/reports/summary")
+async def get_report_summary(db: Session = Depends(get_db)):
+    # Same off-loop treatment as /dashboard: per-FY FIFO sweeps and price
+    # fetches run in a worker thread.
+    return await asyncio.to_thread(_get_report_summary_sync, db)
+
 @app.get("/reports/realized")
 def get_report_realized(fy: Optional[str] = None, db: Session = Depends(get_db)):
     try:
-        trades_df = pd.read_sql(db.query(Trade).statement, db.bind)
-        notes_df = pd.read_sql(db.query(ContractNote).statement, db.bind)
-        corporate_actions_df = _load_corporate_actions_df(db)
-        alias_map = _load_symbol_alias_map(db)
-        trades_df = _apply_aliases_to_trades_df(trades_df, alias_map)
-        if trades_df.empty:
-            return {"fy": fy, "rows": []}
-
-        realized = calculate_realized_gains(trades_df, notes_df, corporate_actions_df=corporate_actions_df)
-        rows = []
-        for r in realized:
-            if fy is None or fy_label(r["sell_date"]) == fy:
-                rows.append({
-                    "symbol": r["symbol"],
-                    "sell_date": r["sell_date"].isoformat(),
-                    "sell_qty": float(r["sell_qty"]),
-                    "sell_price": round(float(r["sell_price"]), 4),
-                    "avg_buy_price": round(float(r["avg_buy_price"]), 4),
-                    "realized_pnl": round(float(r["realized_pnl"]), 2),
-                })
+        # Indexed fetch from the persisted realized_lots table; the table is
+        # rebuilt on commit/alias/corp-action changes, not per request.
+        _ensure_realized_table(db)
+        q = db.query(RealizedLot)
+        if fy is not None:
+            q = q.filter(RealizedLot.fy == fy)
+        rows = [
+            {
+                "symbol": r.symbol,
+                "sell_date": r.sell_date.isoformat(),
+                "sell_qty": float(r.sell_qty),
+                "sell_price": round(float(r.sell_price), 4),
+                "avg_buy_price": round(float(r.avg_buy_price), 4),
+                "realized_pnl": round(float(r.realized_pnl), 2),
+            }
+            for r in q.order_by(RealizedLot.sell_date, RealizedLot.id).all()
+        ]
         return {"fy": fy, "rows": rows}
     except Exception as e:
         _user_log(f"Report Realized Error: {e}")
@@ -1175,8 +1768,8 @@ def post_tax_report(payload: dict, db: Session = Depends(get_db)):
             base_currency=str(payload.get("base_currency") or "EUR"),
         )
 
-        trades_df = pd.read_sql(db.query(Trade).statement, db.bind)
-        notes_df = pd.read_sql(db.query(ContractNote).statement, db.bind)
+        trades_df = _load_trades_df(db)
+        notes_df = _load_notes_df(db)
         corporate_actions_df = _load_corporate_actions_df(db)
         alias_map = _load_symbol_alias_map(db)
         trades_df = _apply_aliases_to_trades_df(trades_df, alias_map)
@@ -1,13 +1,91 @@
 from __future__ import annotations
 
+from collections import deque
 from datetime import date
 from typing import List, Dict, Any
 
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional; Python loop is the fallback
+    njit = None
+
 from ..base import TaxCalculator
 from ..types import TaxReportRequest
 
+# Proleptic-Gregorian ordinal of the numpy datetime64 epoch; converts
+# datetime64[D] day counts to date.toordinal() day counts.
+_EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _fi_fifo_kernel(codes, sides, date_ord, ten_mark_ord, qty, gross_price, net_price,
+                        buy_rows, buy_starts, heads, rem):
+        # Same typed FIFO state machine as core's _fifo_realize_kernel, but
+        # accumulating the Finland per-sale aggregates. sides: 0=BUY, 1=SELL,
+        # 2=other. Dates arrive as day ordinals so the 10-year deemed-rate
+        # check and holding years are pure integer/float math.
+        n = codes.shape[0]
+        out_idx = np.empty(n, np.int64)
+        out = np.empty((n, 6), np.float64)
+        m = 0
+        for i in range(n):
+            if sides[i] != 1:
+                continue
+            c = codes[i]
+            qty_to_sell = qty[i]
+            gross_sell = gross_price[i]
+            alloc_sell_per_unit = gross_sell - net_price[i]
+            if alloc_sell_per_unit < 0.0:
+                alloc_sell_per_unit = 0.0
+            sell_ord = date_ord[i]
+            proceeds = 0.0
+            actual_acq = 0.0
+            deductible = 0.0
+            deemed_cost = 0.0
+            holding_years_weighted = 0.0
+            matched_qty = 0.0
+            h = heads[c]
+            end = buy_starts[c + 1]
+            while qty_to_sell > 1e-7 and h < end:
+                j = buy_rows[h]
+                if j > i:
+                    break  # lot not purchased yet at this point in the stream
+                take = rem[j] if rem[j] < qty_to_sell else qty_to_sell
+                lot_proceeds = gross_sell * take
+                buy_charge = (net_price[j] - gross_price[j]) * take
+                if buy_charge < 0.0:
+                    buy_charge = 0.0
+                holding_years = (sell_ord - date_ord[j]) / 365.25
+                if holding_years < 0.0:
+                    holding_years = 0.0
+                rate = 0.40 if sell_ord >= ten_mark_ord[j] else 0.20
+                proceeds += lot_proceeds
+                actual_acq += gross_price[j] * take
+                deductible += buy_charge + alloc_sell_per_unit * take
+                deemed_cost += lot_proceeds * rate
+                holding_years_weighted += holding_years * take
+                matched_qty += take
+                rem[j] -= take
+                qty_to_sell -= take
+                if rem[j] <= 1e-7:
+                    h += 1
+            heads[c] = h
+            out_idx[m] = i
+            out[m, 0] = proceeds
+            out[m, 1] = actual_acq
+            out[m, 2] = deductible
+            out[m, 3] = deemed_cost
+            out[m, 4] = holding_years_weighted
+            out[m, 5] = matched_qty
+            m += 1
+        return out_idx[:m], out[:m]
+else:
+    _fi_fifo_kernel = None
+
 
 class FinlandTaxCalculator(TaxCalculator):
     """
@@ -22,6 +100,9 @@ class FinlandTaxCalculator(TaxCalculator):
     def _sanitize_trades_df(trades_df: pd.DataFrame) -> pd.DataFrame:
         if trades_df is None or trades_df.empty:
             return pd.DataFrame(columns=["trade_id", "symbol", "date", "type", "quantity", "price", "gross_amount"])
+        # Under pandas Copy-on-Write this copy is lazy (no data duplicated
+        # until a column is written), but it keeps the caller's frame safe
+        # from the column writes below.
         df = trades_df.copy()
         if "date" not in df.columns:
             raise ValueError("Trades data is missing 'date' column.")
@@ -37,29 +118,40 @@ class FinlandTaxCalculator(TaxCalculator):
         if "gross_amount" not in df.columns:
             df["gross_amount"] = df["quantity"].astype(float) * df["price"].astype(float)
 
-        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
-        df = df[df["date"].notna()].copy()
+        # Stay on datetime64 (normalized to midnight) instead of python date
+        # objects: the notes merge and daily groupby then hash int64 keys.
+        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.normalize()
+        df = df[df["date"].notna()]
         df["type"] = df["type"].astype(str).str.upper()
         df["symbol"] = df["symbol"].astype(str).str.upper()
         df["quantity"] = df["quantity"].astype(float)
         df["price"] = df["price"].astype(float)
         df["gross_amount"] = df["gross_amount"].astype(float)
-        return df[["trade_id", "symbol", "date", "type", "quantity", "price", "gross_amount"]].copy()
+        return df[["trade_id", "symbol", "date", "type", "quantity", "price", "gross_amount"]]
+
+    @staticmethod
+    def _empty_notes_df() -> pd.DataFrame:
+        # The date column must carry datetime64 dtype even when empty so the
+        # left merge with the trades frame stays on matching key types.
+        df = pd.DataFrame(columns=["date", "total_brokerage", "total_taxes", "total_other_charges"])
+        df["date"] = pd.to_datetime(df["date"])
+        return df
 
     @staticmethod
     def _sanitize_notes_df(notes_df: pd.DataFrame) -> pd.DataFrame:
         if notes_df is None or notes_df.empty:
-            return pd.DataFrame(columns=["date", "total_brokerage", "total_taxes", "total_other_charges"])
+            return FinlandTaxCalculator._empty_notes_df()
         df = notes_df.copy()
         if "date" not in df.columns:
-            return pd.DataFrame(columns=["date", "total_brokerage", "total_taxes", "total_other_charges"])
-        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
-        df = df[df["date"].notna()].copy()
-        for col in ["total_brokerage", "total_taxes", "total_other_charges"]:
+            return FinlandTaxCalculator._empty_notes_df()
+        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.normalize()
+        df = df[df["date"].notna()]
+        charge_cols = ["total_brokerage", "total_taxes", "total_other_charges"]
+        for col in charge_cols:
             if col not in df.columns:
                 df[col] = 0.0
-            df[col] = df[col].fillna(0.0).astype(float)
-        return df[["date", "total_brokerage", "total_taxes", "total_other_charges"]].copy()
+        df[charge_cols] = df[charge_cols].fillna(0.0).astype(float)
+        return df[["date", "total_brokerage", "total_taxes", "total_other_charges"]]
 
     @staticmethod
     def _apply_daily_charge_allocations(trades_df: pd.DataFrame, notes_df: pd.DataFrame) -> pd.DataFrame:
@@ -76,39 +168,34 @@ class FinlandTaxCalculator(TaxCalculator):
             + merged["total_taxes"].abs()
             + merged["total_other_charges"].abs()
         )
-        daily_turnover = merged.groupby("date")["gross_amount"].transform("sum")
-        merged["allocated_charge"] = 0.0
-        mask = daily_turnover > 0
-        merged.loc[mask, "allocated_charge"] = (
-            merged.loc[mask, "gross_amount"] / daily_turnover.loc[mask]
-        ) * merged.loc[mask, "daily_charges"]
-        merged["net_price"] = merged.apply(
-            lambda x: (x["gross_amount"] + x["allocated_charge"]) / x["quantity"]
-            if x["type"] == "BUY"
-            else (x["gross_amount"] - x["allocated_charge"]) / x["quantity"],
-            axis=1,
+        # One NumPy pass over whole columns instead of a masked assignment
+        # plus a per-row apply(axis=1) lambda for net_price. The daily
+        # turnover is one hash-aggregate joined back on, rather than a
+        # transform("sum") sort-and-broadcast over the unsorted index.
+        daily = trades_df.groupby("date", sort=False, observed=True)["gross_amount"].sum().rename("daily_turnover")
+        merged = merged.merge(daily, on="date", how="left")
+        daily_turnover = merged["daily_turnover"].to_numpy(dtype=float)
+        gross = merged["gross_amount"].to_numpy(dtype=float)
+        charges = merged["daily_charges"].to_numpy(dtype=float)
+        has_turnover = daily_turnover > 0
+        allocated = np.where(
+            has_turnover,
+            gross / np.where(has_turnover, daily_turnover, 1.0) * charges,
+            0.0,
         )
+        sign = np.where(merged["type"].to_numpy() == "BUY", 1.0, -1.0)
+        merged["allocated_charge"] = allocated
+        merged["net_price"] = (gross + sign * allocated) / merged["quantity"].to_numpy(dtype=float)
         return merged
 
     @staticmethod
-    def _holding_years(buy_date: date, sell_date: date) -> float:
-        delta_days = (sell_date - buy_date).days
-        return max(0.0, float(delta_days) / 365.25)
-
-    @staticmethod
-    def _held_at_least_10_years(buy_date: date, sell_date: date) -> bool:
-        if sell_date < buy_date:
-            return False
+    def _ten_year_mark(buy_date: date) -> date:
+        """Date on which a lot bought on buy_date qualifies for the 40% deemed rate."""
         try:
-            ten_year_mark = buy_date.replace(year=buy_date.year + 10)
+            return buy_date.replace(year=buy_date.year + 10)
         except ValueError:
             # Handles Feb 29 -> Feb 28 on non-leap year.
-            ten_year_mark = buy_date.replace(month=2, day=28, year=buy_date.year + 10)
-        return sell_date >= ten_year_mark
-
-    @staticmethod
-    def _deemed_rate_for_lot(buy_date: date, sell_date: date) -> float:
-        return 0.40 if FinlandTaxCalculator._held_at_least_10_years(buy_date, sell_date) else 0.20
+            return buy_date.replace(month=2, day=28, year=buy_date.year + 10)
 
     @staticmethod
     def _tax_from_progressive_rate(taxable_amount: float) -> float:
@@ -118,42 +205,102 @@ class FinlandTaxCalculator(TaxCalculator):
         upper_band = max(0.0, taxable_amount - 30000.0) * 0.34
         return lower_band + upper_band
 
-    def _calculate_rows(
-        self,
-        merged_df: pd.DataFrame,
-        tax_year: int,
-        method_mode: str,
-    ) -> List[Dict[str, Any]]:
-        # FIFO inventory by symbol. Each BUY appends a lot, each SELL consumes oldest lots first.
-        lots: Dict[str, List[Dict[str, Any]]] = {}
-        rows: List[Dict[str, Any]] = []
-        trade_index = 0
+    @staticmethod
+    def _tax_from_progressive_rate_vec(taxable_amounts: np.ndarray) -> np.ndarray:
+        """Batch form of _tax_from_progressive_rate for per-group breakouts
+        (e.g. tax by symbol or by year across a multi-year report)."""
+        arr = np.asarray(taxable_amounts, dtype=np.float64)
+        return np.where(
+            arr <= 0,
+            0.0,
+            np.minimum(arr, 30000.0) * 0.30 + np.maximum(arr - 30000.0, 0.0) * 0.34,
+        )
+
+    @classmethod
+    def _ten_year_mark_ordinals(cls, date_ord, sides) -> np.ndarray:
+        """Per-row day ordinal of the 10-year deemed-rate boundary (BUY rows).
+
+        The boundary needs calendar math (leap-day aware), so it is computed
+        once per distinct buy date here rather than once per consumed lot.
+        """
+        ten_mark_ord = np.zeros(len(date_ord), dtype=np.int64)
+        marks: Dict[int, int] = {}
+        for j in np.nonzero(sides == 0)[0]:
+            o = int(date_ord[j])
+            mark = marks.get(o)
+            if mark is None:
+                mark = marks[o] = cls._ten_year_mark(date.fromordinal(o)).toordinal()
+            ten_mark_ord[j] = mark
+        return ten_mark_ord
+
+    @staticmethod
+    def _match_sells_njit(codes, sides, date_ord, ten_mark_ord, qty, gross_price, net_price):
+        """Run the compiled FIFO matcher; returns (sell_row_indices, aggregates).
+
+        Aggregates are 6-tuples of python floats per SELL row (including
+        unmatched sells): proceeds, actual acquisition cost, deductible
+        expenses, deemed cost, qty-weighted holding years, matched qty.
+        """
+        codes = codes.astype(np.int64)
+        buy_idx = np.nonzero(sides == 0)[0]
+        # Group each symbol's buy rows contiguously (stable, so chronological
+        # order survives) — same layout as core's _fifo_kernel_inputs.
+        buy_rows = buy_idx[np.argsort(codes[buy_idx], kind="stable")].astype(np.int64)
+        n_sym = int(codes.max()) + 1 if codes.size else 0
+        counts = np.bincount(codes[buy_rows], minlength=n_sym)
+        buy_starts = np.zeros(n_sym + 1, dtype=np.int64)
+        np.cumsum(counts, out=buy_starts[1:])
+        heads = buy_starts[:-1].copy()
+        rem = qty.copy()
+        out_idx, out = _fi_fifo_kernel(
+            codes, sides, date_ord, ten_mark_ord, qty, gross_price, net_price,
+            buy_rows, buy_starts, heads, rem,
+        )
+        # float() before any round(): round() on np.float64 differs from
+        # python-float rounding at half-cent boundaries.
+        aggregates = [
+            (float(out[k, 0]), float(out[k, 1]), float(out[k, 2]),
+             float(out[k, 3]), float(out[k, 4]), float(out[k, 5]))
+            for k in range(out_idx.shape[0])
+        ]
+        return out_idx.tolist(), aggregates
 
-        for _, trade in merged_df.sort_values(["date", "trade_id"]).iterrows():
-            symbol = str(trade["symbol"] or "").upper()
-            side = str(trade["type"] or "").upper()
-            if side == "BUY":
-                lots.setdefault(symbol, []).append(
+    @staticmethod
+    def _match_sells_python(codes, sides, date_ord, ten_mark_ord, qty, gross_price, net_price):
+        """Pure-python fallback for _match_sells_njit; identical contract.
+
+        Works on the same precomputed day ordinals as the kernel, so holding
+        years and the 10-year deemed-rate check stay plain arithmetic here
+        too — no per-lot date.replace or helper calls.
+        """
+        # FIFO inventory by symbol. Each BUY appends a lot, each SELL consumes
+        # oldest lots first; deques make the front pops O(1) instead of
+        # shifting the whole list.
+        lots: Dict[int, deque] = {}
+        sell_idx: List[int] = []
+        aggregates: List[tuple] = []
+
+        for i in range(len(codes)):
+            code = codes[i]
+            if sides[i] == 0:
+                lots.setdefault(code, deque()).append(
                     {
-                        "qty": float(trade["quantity"]),
-                        "buy_date": trade["date"],
-                        "gross_buy_price": float(trade["price"]),
-                        "net_buy_price": float(trade["net_price"]),
+                        "qty": qty[i],
+                        "buy_ord": date_ord[i],
+                        "ten_mark": ten_mark_ord[i],
+                        "gross_buy_price": gross_price[i],
+                        "net_buy_price": net_price[i],
                     }
                 )
                 continue
 
-            if side != "SELL":
+            if sides[i] != 1:
                 continue
 
-            sell_date = trade["date"]
-            if sell_date.year != tax_year:
-                # FIFO inventory still needs to consume sells from other years for correct lot positions.
-                pass
-
-            qty_to_sell = float(trade["quantity"])
-            gross_sell_price = float(trade["price"])
-            net_sell_price = float(trade["net_price"])
+            sell_ord = date_ord[i]
+            qty_to_sell = qty[i]
+            gross_sell_price = gross_price[i]
+            net_sell_price = net_price[i]
             alloc_sell_per_unit = max(0.0, gross_sell_price - net_sell_price)
 
             proceeds = 0.0
@@ -163,20 +310,20 @@ class FinlandTaxCalculator(TaxCalculator):
             avg_holding_years_weighted = 0.0
             matched_qty = 0.0
 
-            lots_for_symbol = lots.setdefault(symbol, [])
+            lots_for_symbol = lots.setdefault(code, deque())
             while qty_to_sell > 1e-7 and lots_for_symbol:
                 lot = lots_for_symbol[0]
-                take_qty = min(float(lot["qty"]), qty_to_sell)
+                take_qty = min(lot["qty"], qty_to_sell)
                 if take_qty <= 0:
-                    lots_for_symbol.pop(0)
+                    lots_for_symbol.popleft()
                     continue
 
                 lot_proceeds = gross_sell_price * take_qty
-                lot_actual_acq = float(lot["gross_buy_price"]) * take_qty
-                lot_buy_charge = max(0.0, (float(lot["net_buy_price"]) - float(lot["gross_buy_price"])) * take_qty)
+                lot_actual_acq = lot["gross_buy_price"] * take_qty
+                lot_buy_charge = max(0.0, (lot["net_buy_price"] - lot["gross_buy_price"]) * take_qty)
                 lot_sell_charge = alloc_sell_per_unit * take_qty
-                lot_holding_years = self._holding_years(lot["buy_date"], sell_date)
-                lot_deemed_rate = self._deemed_rate_for_lot(lot["buy_date"], sell_date)
+                lot_holding_years = max(0.0, (sell_ord - lot["buy_ord"]) / 365.25)
+                lot_deemed_rate = 0.40 if sell_ord >= lot["ten_mark"] else 0.20
                 lot_deemed_cost = lot_proceeds * lot_deemed_rate
 
                 proceeds += lot_proceeds
@@ -186,13 +333,80 @@ class FinlandTaxCalculator(TaxCalculator):
                 avg_holding_years_weighted += lot_holding_years * take_qty
                 matched_qty += take_qty
 
-                lot["qty"] = float(lot["qty"]) - take_qty
+                lot["qty"] = lot["qty"] - take_qty
                 qty_to_sell -= take_qty
                 if lot["qty"] <= 1e-7:
-                    lots_for_symbol.pop(0)
+                    lots_for_symbol.popleft()
+
+            sell_idx.append(i)
+            aggregates.append(
+                (proceeds, actual_acquisition_cost, deductible_expenses,
+                 deemed_cost, avg_holding_years_weighted, matched_qty)
+            )
+
+        return sell_idx, aggregates
 
+    def _calculate_rows(
+        self,
+        merged_df: pd.DataFrame,
+        tax_year: int,
+        method_mode: str,
+        include_rows: bool = True,
+    ) -> tuple[List[Dict[str, Any]], Dict[str, float], Dict[str, int]]:
+        rows: List[Dict[str, Any]] = []
+        method_counts = {"actual": 0, "deemed": 0}
+        # Report totals accumulate here as rows are emitted — one pass, and
+        # python-float addition so the final round() matches the per-row ones.
+        # Int zero start mirrors sum()'s default so a row-less year still
+        # serializes its totals as 0, not 0.0.
+        total_proceeds = 0
+        total_actual = 0
+        total_deemed = 0
+        total_selected = 0
+
+        # Pull plain columns once and index by position; iterrows() would
+        # allocate a Series per row (same trick as core's FIFO loops).
+        sorted_df = merged_df.sort_values(["date", "trade_id"], kind="mergesort")
+        # Factorize symbols once: the lot inventory hashes int codes instead
+        # of strings. The sanitizer already uppercased symbol and type, so no
+        # further normalization happens here.
+        codes, uniques = pd.factorize(sorted_df["symbol"].to_numpy())
+        symbol_names = [str(u) for u in uniques]
+        types = sorted_df["type"].to_numpy()
+        sides = np.where(types == "BUY", 0, np.where(types == "SELL", 1, 2)).astype(np.int8)
+        # Day ordinals come straight off the datetime64 column — one vector
+        # cast instead of a python toordinal() per row.
+        date_ord = sorted_df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORD
+        sell_years = sorted_df["date"].dt.year.to_numpy()
+        ten_mark_ord = self._ten_year_mark_ordinals(date_ord, sides)
+        # One cast per column to a contiguous float64 ndarray; neither matcher
+        # touches the DataFrame after this point.
+        qty = np.ascontiguousarray(sorted_df["quantity"].to_numpy(dtype=np.float64))
+        price = np.ascontiguousarray(sorted_df["price"].to_numpy(dtype=np.float64))
+        net_price = np.ascontiguousarray(sorted_df["net_price"].to_numpy(dtype=np.float64))
+        trade_id_arr = sorted_df["trade_id"].to_numpy()
+
+        if _fi_fifo_kernel is not None:
+            sell_idx, aggregates = self._match_sells_njit(
+                codes, sides, date_ord, ten_mark_ord, qty, price, net_price,
+            )
+        else:
+            # tolist() keeps the fallback's accumulators python floats —
+            # round() on np.float64 differs at half-cent boundaries.
+            sell_idx, aggregates = self._match_sells_python(
+                codes, sides, date_ord.tolist(), ten_mark_ord.tolist(),
+                qty.tolist(), price.tolist(), net_price.tolist(),
+            )
+
+        for trade_index, (i, agg) in enumerate(zip(sell_idx, aggregates)):
+            (proceeds, actual_acquisition_cost, deductible_expenses,
+             deemed_cost, avg_holding_years_weighted, matched_qty) = agg
             if matched_qty <= 0:
-                trade_index += 1
+                continue
+
+            # Sells from other years still consumed lots above; they just
+            # don't produce a report row.
+            if sell_years[i] != tax_year:
                 continue
 
             actual_gain = proceeds - (actual_acquisition_cost + deductible_expenses)
@@ -210,27 +424,48 @@ class FinlandTaxCalculator(TaxCalculator):
                 selected_method = "deemed" if deemed_gain < actual_gain else "actual"
                 selected_gain = min(actual_gain, deemed_gain)
 
-            row = {
-                "sale_id": str(trade.get("trade_id") or f"{symbol}-{sell_date.isoformat()}-{trade_index}"),
+            # The rounding stays even when rows are skipped: the report
+            # totals are defined as sums of the rounded per-row figures.
+            proceeds_rounded = round(proceeds, 2)
+            actual_rounded = round(actual_gain, 2)
+            deemed_rounded = round(deemed_gain, 2)
+            selected_rounded = round(selected_gain, 2)
+            total_proceeds += proceeds_rounded
+            total_actual += actual_rounded
+            total_deemed += deemed_rounded
+            total_selected += selected_rounded
+            method_counts[selected_method] += 1
+
+            if not include_rows:
+                continue
+
+            sell_date = date.fromordinal(int(date_ord[i]))
+            symbol = symbol_names[codes[i]]
+            rows.append({
+                "sale_id": str(trade_id_arr[i] or f"{symbol}-{sell_date.isoformat()}-{trade_index}"),
                 "symbol": symbol,
                 "sell_date": sell_date.isoformat(),
                 "sell_qty": round(matched_qty, 4),
-                "proceeds": round(proceeds, 2),
+                "proceeds": proceeds_rounded,
                 "actual_acquisition_cost": round(actual_acquisition_cost, 2),
                 "transfer_tax": 0.0,
                 "deductible_expenses": round(deductible_expenses, 2),
-                "actual_taxable_gain_loss": round(actual_gain, 2),
+                "actual_taxable_gain_loss": actual_rounded,
                 "deemed_rate_effective": round((deemed_cost / proceeds) if proceeds > 0 else 0.0, 4),
                 "deemed_cost": round(deemed_cost, 2),
-                "deemed_taxable_gain_loss": round(deemed_gain, 2),
+                "deemed_taxable_gain_loss": deemed_rounded,
                 "selected_method": selected_method,
-                "selected_taxable_gain_loss": round(selected_gain, 2),
+                "selected_taxable_gain_loss": selected_rounded,
                 "avg_holding_years": round(avg_holding_years_weighted / matched_qty, 3),
-            }
-            trade_index += 1
-            rows.append(row)
+            })
 
-        return rows
+        totals = {
+            "proceeds": total_proceeds,
+            "actual": total_actual,
+            "deemed": total_deemed,
+            "selected": total_selected,
+        }
+        return rows, totals, method_counts
 
     def calculate(
         self,
@@ -283,13 +518,14 @@ class FinlandTaxCalculator(TaxCalculator):
             }
 
         merged = self._apply_daily_charge_allocations(clean_trades, clean_notes)
-        all_rows = self._calculate_rows(merged, request.tax_year, method_mode)
-        rows = [r for r in all_rows if pd.to_datetime(r["sell_date"]).year == request.tax_year]
+        rows, totals, method_counts = self._calculate_rows(
+            merged, request.tax_year, method_mode, include_rows=bool(request.include_rows)
+        )
 
-        total_proceeds = sum(float(r["proceeds"]) for r in rows)
-        total_actual = sum(float(r["actual_taxable_gain_loss"]) for r in rows)
-        total_deemed = sum(float(r["deemed_taxable_gain_loss"]) for r in rows)
-        total_selected = sum(float(r["selected_taxable_gain_loss"]) for r in rows)
+        total_proceeds = totals["proceeds"]
+        total_actual = totals["actual"]
+        total_deemed = totals["deemed"]
+        total_selected = totals["selected"]
 
         small_sales_exemption_applied = total_proceeds <= 1000.0
         prior_loss = max(0.0, float(request.prior_loss_carryforward or 0.0))
@@ -313,10 +549,6 @@ class FinlandTaxCalculator(TaxCalculator):
                 loss_to_carry = prior_loss + abs(taxable_after_adjustments)
             estimated_tax = self._tax_from_progressive_rate(taxable_after_adjustments)
 
-        method_counts = {"actual": 0, "deemed": 0}
-        for row in rows:
-            method_counts[row["selected_method"]] = method_counts.get(row["selected_method"], 0) + 1
-
         return {
             "country_code": "FI",
             "country_name": "Finland",
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Optional
+
 from .base import TaxCalculator
 from .countries import FinlandTaxCalculator
 
@@ -7,13 +10,25 @@ _CALCULATORS = {
 }
 
 
+# Calculators are stateless singletons, so repeated lookups can share the
+# resolved instance. Caching on the raw code also skips the strip/upper
+# normalization for the common case of a client sending the same string
+# on every request.
+@lru_cache(maxsize=32)
+def _resolve(country_code: str) -> Optional[TaxCalculator]:
+    return _CALCULATORS.get((country_code or "").strip().upper())
+
+
 def get_tax_calculator(country_code: str) -> TaxCalculator:
-    code = (country_code or "").strip().upper()
-    calc = _CALCULATORS.get(code)
+    calc = _resolve(country_code)
     if not calc:
         raise ValueError(f"Unsupported country_code: {country_code}")
     return calc
 
 
+# The registry is fixed at import time, so the sorted listing is too.
+_SUPPORTED_COUNTRIES = sorted(_CALCULATORS.keys())
+
+
 def supported_countries() -> list[str]:
-    return sorted(_CALCULATORS.keys())
+    return _SUPPORTED_COUNTRIES
@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+# Frozen: requests are never mutated after construction. (No slots=True —
+# that dataclass parameter needs Python 3.10 and the image runs 3.9.)
+@dataclass(frozen=True)
 class TaxReportRequest:
     country_code: str
     tax_year: int